@@ -0,0 +1,203 @@
+import os
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+import speech_recognition as sr
+from metrics import span
+
+# ========== Config ==========
+SAMPLE_RATE = 16000
+CHUNK = 1024                # samples per read (64 ms at 16 kHz)
+MIN_THRESHOLD = 300         # int16 RMS floor for the speech threshold
+NOISE_RATIO = 3.0           # speech must be this many times louder than the noise floor
+NOISE_ALPHA = 0.05          # smoothing of the running noise-floor estimate
+NOISE_WINDOW_SECONDS = 5.0  # recent chunk levels whose minimum the floor follows during speech
+SPEECH_START_CHUNKS = 2     # consecutive loud chunks that open an utterance
+SILENCE_SECONDS = 0.8       # trailing silence that closes an utterance
+PRE_ROLL_SECONDS = 0.3      # audio kept from before the onset so the first syllable survives
+# Longest utterance before it is closed regardless of level, so steady noise cannot hold one open
+MAX_UTTERANCE_SECONDS = float(os.environ.get("ISL_MAX_UTTERANCE_SECONDS", "15"))
+RETRY_SECONDS = 5.0         # wait before reopening a device that failed, doubled per failure
+MAX_RETRY_SECONDS = 60.0
+DEVICE_INDEX = os.environ.get("ISL_MIC_DEVICE_INDEX")
+
+
+class AudioCaptureService:
+    """Keeps the microphone open and segments its audio into utterances.
+
+    A background thread reads the device continuously, tracks the ambient
+    noise floor, and runs a simple energy VAD against it, so callers never
+    pay for opening the device or calibrating. During speech the floor only
+    rises towards the quietest chunk of the last NOISE_WINDOW_SECONDS
+    (minimum statistics), and no utterance outlasts MAX_UTTERANCE_SECONDS.
+    Consumers ask for the next utterance with listen() or utterance_chunks().
+    If the device cannot be opened, the error is kept and raised to every
+    consumer, and start() waits RETRY_SECONDS (doubling up to
+    MAX_RETRY_SECONDS) before trying again.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, chunk=CHUNK, device_index=None):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.chunk = chunk
+        self.device_index = device_index
+        self.noise_floor = float(MIN_THRESHOLD) / NOISE_RATIO
+        self.in_speech = False
+        self.error = None
+        self._failed_at = None
+        self._retry_delay = RETRY_SECONDS
+        self._loud_run = 0
+        self._silent_for = 0.0
+        self._speech_for = 0.0
+        self._chunk_seconds = chunk / sample_rate
+        self._levels = deque(maxlen=max(1, int(NOISE_WINDOW_SECONDS / self._chunk_seconds)))
+        self._pre_roll = deque(maxlen=max(1, int(PRE_ROLL_SECONDS / self._chunk_seconds)))
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def threshold(self):
+        return max(MIN_THRESHOLD, self.noise_floor * NOISE_RATIO)
+
+    def start(self):
+        """Open the device on a background thread (no-op if running or backing off after a failure)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self._retry_delay:
+                return
+            self.error = None
+            self._thread = threading.Thread(target=self._run, name="isl-audio-capture", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            with sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                               chunk_size=self.chunk) as source:
+                with self._lock:
+                    self._failed_at = None
+                    self._retry_delay = RETRY_SECONDS
+                while True:
+                    self._process(source.stream.read(self.chunk))
+        except BaseException as e:
+            with self._lock:
+                if self._failed_at is not None:
+                    self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_SECONDS)
+                self._failed_at = time.monotonic()
+                self.error = e
+            self._publish(("error", e))
+
+    def _process(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        self._levels.append(rms)
+        loud = rms > self.threshold
+        if not self.in_speech:
+            if not loud:
+                self.noise_floor += NOISE_ALPHA * (rms - self.noise_floor)
+                self._loud_run = 0
+                self._pre_roll.append(chunk)
+                return
+            self._loud_run += 1
+            self._pre_roll.append(chunk)
+            if self._loud_run < SPEECH_START_CHUNKS:
+                return
+            self.in_speech = True
+            self._silent_for = 0.0
+            self._speech_for = 0.0
+            for earlier in self._pre_roll:
+                self._publish(("speech", earlier))
+            self._pre_roll.clear()
+            return
+        self._publish(("speech", chunk))
+        # Pauses between words keep the window minimum at the noise level, so
+        # speech itself does not raise the bar, but noise that got louder does
+        quietest = min(self._levels)
+        if quietest > self.noise_floor:
+            self.noise_floor += NOISE_ALPHA * (quietest - self.noise_floor)
+        self._speech_for += self._chunk_seconds
+        self._silent_for = 0.0 if loud else self._silent_for + self._chunk_seconds
+        if self._silent_for >= SILENCE_SECONDS or self._speech_for >= MAX_UTTERANCE_SECONDS:
+            self.in_speech = False
+            self._loud_run = 0
+            self._publish(("end", None))
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            q.put(event)
+
+    def utterance_chunks(self, timeout=10, phrase_time_limit=None, stop=None):
+        """Yield the raw PCM chunks of the next utterance as they are captured.
+
+        Raises sr.WaitTimeoutError if no speech starts within timeout seconds,
+        or the capture error if the device could not be opened.
+        Stops at the end of the utterance, after phrase_time_limit seconds of
+        speech, or when the stop event is set.
+        """
+        self.start()
+        q = queue.Queue()
+        with self._lock:
+            self._subscribers.add(q)
+            # A failure published before we subscribed would otherwise look like a timeout
+            error = self.error
+        try:
+            if error is not None:
+                raise error
+            # Speech already in progress belongs to someone else; wait for the next onset
+            waiting_for_onset = self.in_speech
+            deadline = time.monotonic() + timeout
+            speech_started = None
+            while stop is None or not stop.is_set():
+                limit = deadline if speech_started is None else speech_started + (phrase_time_limit or 1e9)
+                remaining = limit - time.monotonic()
+                if remaining <= 0:
+                    if speech_started is None:
+                        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                    return
+                try:
+                    kind, chunk = q.get(timeout=min(remaining, 0.25))
+                except queue.Empty:
+                    continue
+                if kind == "error":
+                    raise chunk
+                if kind == "end":
+                    if waiting_for_onset:
+                        waiting_for_onset = False
+                        continue
+                    if speech_started is not None:
+                        return
+                    continue
+                if waiting_for_onset:
+                    continue
+                if speech_started is None:
+                    speech_started = time.monotonic()
+                yield chunk
+        finally:
+            with self._lock:
+                self._subscribers.discard(q)
+
+    @span("listen")
+    def listen(self, timeout=10, phrase_time_limit=None):
+        """Block until the next utterance is complete and return it as sr.AudioData."""
+        data = b"".join(self.utterance_chunks(timeout, phrase_time_limit))
+        return sr.AudioData(data, self.sample_rate, self.sample_width)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_audio_capture():
+    """Return the process-wide capture service, starting it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            index = int(DEVICE_INDEX) if DEVICE_INDEX else None
+            _service = AudioCaptureService(device_index=index)
+        _service.start()
+        return _service
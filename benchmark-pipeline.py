@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import cv2
+import numpy as np
+
+# Trimming is fixed when trim.py is imported, so --no-trim has to be applied first
+if __name__ == "__main__" and "--no-trim" in sys.argv:
+    os.environ["ISL_TRIM_IDLE"] = "0"
+
+from frame_store import decode_video_frames
+from trim import TRIM_IDLE
+from clip_cache import ClipCache
+from pipeline import SignPipeline
+from transitions import TransitionEngine
+from render import assemble_sentence, encode_frames, RENDER_FPS, PAUSE_SECONDS
+from metrics import get_metrics
+
+# Sentences replayed by default; words without a clip are spelled out
+DEFAULT_CORPUS = [
+    "HELLO",
+    "THANK YOU",
+    "HOW ARE YOU",
+    "HELLO HOW ARE YOU",
+    "GOOD MORNING",
+    "WHAT IS YOUR NAME",
+    "MY NAME IS RAVI",
+    "NICE TO MEET YOU",
+    "I AM FINE THANK YOU",
+    "PLEASE COME TOMORROW",
+    "WHERE IS THE HOSPITAL",
+    "SEE YOU LATER",
+]
+PHRASE_GLOSSES = ["HELLO", "THANK YOU", "HOW ARE YOU", "GOOD MORNING", "NAME", "PLEASE", "TOMORROW"]
+
+
+# ========== Synthetic Library ==========
+def synthetic_clip(path, seed, width, height, frames, fps):
+    """Write a clip of a moving blob over a static textured background.
+
+    The first and last fifth of the frames are still, like a signer waiting
+    before and after a sign.
+    """
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 8)
+    start = rng.uniform(0.2, 0.8, 2) * (width, height)
+    end = rng.uniform(0.2, 0.8, 2) * (width, height)
+    color = tuple(int(c) for c in rng.integers(60, 255, 3))
+    radius = max(4, min(width, height) // 10)
+    idle = frames // 5
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for i in range(frames):
+        t = min(max((i - idle) / max(1, frames - 2 * idle - 1), 0.0), 1.0)
+        x, y = start + (end - start) * t
+        frame = background.copy()
+        cv2.circle(frame, (int(x), int(y)), radius, color, -1)
+        writer.write(frame)
+    writer.release()
+
+
+def build_library(video_dir, clips, width, height, frames, fps, seed):
+    """Create letters A-Z, the common phrase glosses, then filler signs up to clips files."""
+    os.makedirs(video_dir, exist_ok=True)
+    glosses = [chr(c) for c in range(ord("A"), ord("Z") + 1)] + PHRASE_GLOSSES
+    filler = 0
+    while len(glosses) < clips:
+        glosses.append(f"SIGN{filler:04d}")
+        filler += 1
+    for i, gloss in enumerate(glosses):
+        synthetic_clip(os.path.join(video_dir, f"{gloss}.mov"), seed + i, width, height, frames, fps)
+    return glosses
+
+
+# ========== Measurements ==========
+def summarize(samples_ms):
+    if not samples_ms:
+        return None
+    values = np.asarray(samples_ms, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb():
+    """Process memory high-water mark in MB, or None where it cannot be read."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def bench_decode(paths):
+    frames = 0
+    start = time.perf_counter()
+    for path in paths:
+        frames += len(decode_video_frames(path))
+    elapsed = time.perf_counter() - start
+    return {"clips": len(paths), "frames": frames, "seconds": round(elapsed, 3),
+            "frames_per_second": round(frames / elapsed, 1) if elapsed else None}
+
+
+def bench_transitions(paths, pairs, steps, rng):
+    """Cold transition time per mode over random clip pairs (no memo, no library)."""
+    edges = {}
+    for path in paths:
+        frames = decode_video_frames(path)
+        if len(frames):
+            edges[path] = (frames[0], frames[-1])
+    names = sorted(edges)
+    results = {}
+    for mode in ("crossfade", "forward", "bidirectional"):
+        engine = TransitionEngine()
+        samples = []
+        for _ in range(pairs):
+            a, b = rng.sample(names, 2)
+            start = time.perf_counter()
+            engine.transition(edges[a][1], edges[b][0], steps=steps, mode=mode)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[mode] = summarize(samples)
+    return results
+
+
+def bench_sentences(corpus, pipeline, repeat, mode, steps, encode, compact=False):
+    """End-to-end latency per sentence: resolve, load, transition and (optionally) encode.
+
+    Sentences are resolved and clips loaded by the SignPipeline, exactly as
+    in the apps: from the frame store when one is compiled, else through the
+    pipeline's clip cache (as CompactClip with compact). The first pass
+    starts from an empty clip cache and transition memo; later passes are
+    warm. Frames are consumed as a player would, without a UI.
+    """
+    pipeline.clip_cache = ClipCache(compact=compact)
+    pipeline.engine = TransitionEngine(library=pipeline.engine.library, index=pipeline.index)
+
+    transition = None
+    if mode != "none":
+        def transition(last_frame, first_frame, pair):
+            return pipeline.engine.transition(last_frame, first_frame, pair, steps=steps, mode=mode)
+
+    runs = {"cold": [], "warm": []}
+    first_frame = {"cold": [], "warm": []}
+    frames_per_sentence = []
+    encode_ms = []
+    for run in range(repeat + 1):
+        phase = "cold" if run == 0 else "warm"
+        for text in corpus:
+            start = time.perf_counter()
+            clips, _ = pipeline.resolve(text)
+            frames = assemble_sentence(clips, pipeline.load, transition, hold_frames=int(PAUSE_SECONDS * RENDER_FPS))
+            kept = [] if encode else None
+            count = 0
+            for frame in frames:
+                if count == 0:
+                    first_frame[phase].append((time.perf_counter() - start) * 1000)
+                count += 1
+                if kept is not None:
+                    kept.append(frame)
+            if kept:
+                encode_start = time.perf_counter()
+                encode_frames(kept, RENDER_FPS)
+                encode_ms.append((time.perf_counter() - encode_start) * 1000)
+            runs[phase].append((time.perf_counter() - start) * 1000)
+            if run == 0:
+                frames_per_sentence.append(count)
+    return {
+        "sentences": len(corpus),
+        "frames_per_sentence": round(float(np.mean(frames_per_sentence)), 1) if frames_per_sentence else 0,
+        "cold": summarize(runs["cold"]),
+        "warm": summarize(runs["warm"]),
+        "first_frame_cold": summarize(first_frame["cold"]),
+        "first_frame_warm": summarize(first_frame["warm"]),
+        "encode": summarize(encode_ms),
+        "trim": TRIM_IDLE,
+        "frame_store": pipeline.store is not None,
+        "clip_cache": pipeline.clip_cache.stats(),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "ffmpeg": bool(shutil.which("ffmpeg")),
+        "commit": commit,
+    }
+
+
+def run_benchmark(args):
+    rng = random.Random(args.seed)
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [line.strip().upper() for line in f if line.strip()]
+    else:
+        corpus = DEFAULT_CORPUS
+
+    temp_dir = None
+    video_dir = args.library
+    if video_dir is None or not os.path.isdir(video_dir):
+        if video_dir is None:
+            temp_dir = tempfile.mkdtemp(prefix="isl-bench-")
+            video_dir = temp_dir
+        start = time.perf_counter()
+        build_library(video_dir, args.clips, args.width, args.height, args.frames, args.fps, args.seed)
+        print(f"Synthetic library: {args.clips} clips in {video_dir} "
+              f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    try:
+        pipeline = SignPipeline(video_dir)
+        paths = sorted(pipeline.index.files)
+        get_metrics().reset()
+        results = {
+            "decode": bench_decode(paths),
+            "transitions": bench_transitions(paths, args.pairs, args.steps, rng),
+            "sentences": bench_sentences(corpus, pipeline, args.repeat, args.mode, args.steps, args.encode,
+                                         compact=args.compact),
+        }
+        results["peak_rss_mb"] = peak_rss_mb()
+        results["stages"] = get_metrics().snapshot()
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "environment": environment(),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmark of the sign rendering pipeline (no Streamlit, no microphone).")
+    parser.add_argument("--library", help="existing clip folder to use, or folder to create; default is a temporary synthetic library")
+    parser.add_argument("--clips", type=int, default=60, help="clips in the synthetic library (letters and phrases included)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=45, help="frames per synthetic clip")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--corpus", help="text file with one sentence per line (default: built-in corpus)")
+    parser.add_argument("--repeat", type=int, default=3, help="warm passes over the corpus after the cold one")
+    parser.add_argument("--pairs", type=int, default=20, help="random clip pairs per transition mode")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--mode", choices=["none", "crossfade", "forward", "bidirectional"], default="forward",
+                        help="transition used in the end-to-end runs")
+    parser.add_argument("--encode", action="store_true", help="also encode each sentence to video")
+    parser.add_argument("--no-trim", action="store_true", help="play clips whole, idle lead-in/out included (same as ISL_TRIM_IDLE=0)")
+    parser.add_argument("--compact", action="store_true", help="cache clips as CompactClip instead of RGB arrays")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(f"Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(report)
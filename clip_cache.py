@@ -0,0 +1,127 @@
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from compact_clip import CompactClip
+
+# ========== Config ==========
+# Byte budget and optional downscale width can be set per deployment
+DEFAULT_BUDGET_MB = float(os.environ.get("ISL_CLIP_CACHE_MB", "512"))
+DEFAULT_MAX_WIDTH = int(os.environ.get("ISL_CLIP_CACHE_MAX_WIDTH", "0"))
+# Compact clips use a fraction of the memory but rebuild RGB on every read; opt in where memory is tight
+DEFAULT_COMPACT = os.environ.get("ISL_CLIP_CACHE_COMPACT", "0") == "1"
+
+
+class ClipCache:
+    """Process-wide LRU cache of decoded clips bounded by total frame bytes.
+
+    Entries are keyed by (path, mtime) so an edited clip is reloaded, stored as
+    one contiguous (count, height, width, 3) array or, with compact=True, a
+    CompactClip (I420 keyframes plus changed tiles, RGB rebuilt on read), and
+    evicted least recently used first once resident bytes exceed the budget.
+    """
+
+    def __init__(self, budget_bytes=None, max_width=None, compact=None):
+        if budget_bytes is None:
+            budget_bytes = int(DEFAULT_BUDGET_MB * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+        self.max_width = DEFAULT_MAX_WIDTH if max_width is None else max_width
+        self.compact = DEFAULT_COMPACT if compact is None else compact
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.raw_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _prepare(self, frames):
+        """Pack frames into a compact clip or one array, downscaling if max_width is set."""
+        if len(frames) == 0:
+            return np.empty((0, 0, 0, 3), dtype=np.uint8)
+        h, w = frames[0].shape[:2]
+        if self.max_width and w > self.max_width:
+            size = (self.max_width, round(h * self.max_width / w))
+            frames = [cv2.resize(f, size, interpolation=cv2.INTER_AREA) for f in frames]
+        if self.compact:
+            return CompactClip.encode(frames)
+        return np.ascontiguousarray(np.stack(frames))
+
+    def get(self, video_path, loader, mtime=None):
+        """Return the cached clip for video_path, calling loader(video_path) on a miss.
+
+        mtime may be supplied from the clip manifest to avoid a stat call.
+        """
+        if mtime is None:
+            try:
+                mtime = os.path.getmtime(video_path)
+            except OSError:
+                mtime = None
+        key = (video_path, mtime)
+        with self._lock:
+            clip = self._entries.get(key)
+            if clip is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return clip
+            self.misses += 1
+
+        # Decode outside the lock so other sessions are not blocked
+        clip = self._prepare(loader(video_path))
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = clip
+                self.resident_bytes += clip.nbytes
+                self.raw_bytes += getattr(clip, "raw_nbytes", clip.nbytes)
+                self._evict()
+        return clip
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.resident_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.resident_bytes -= old.nbytes
+            self.raw_bytes -= getattr(old, "raw_nbytes", old.nbytes)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+            self.raw_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "resident_bytes": self.resident_bytes,
+                "raw_bytes": self.raw_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def describe(self):
+        s = self.stats()
+        ratio = s["raw_bytes"] / s["resident_bytes"] if s["resident_bytes"] else 1.0
+        return (f"Clip cache: {s['entries']} clips, "
+                f"{s['resident_bytes'] / 1e6:.1f}/{s['budget_bytes'] / 1e6:.0f} MB "
+                f"({ratio:.1f}x smaller than RGB), "
+                f"hit rate {s['hit_rate']:.0%}, {s['evictions']} evictions")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_clip_cache():
+    """Return the shared cache for this process, creating it on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ClipCache()
+        return _default_cache
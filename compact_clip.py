@@ -0,0 +1,165 @@
+import threading
+import cv2
+import numpy as np
+
+# ========== Config ==========
+TILE = 16                 # luma tile size; chroma tiles are TILE // 2
+KEYFRAME_INTERVAL = 30    # full frames stored this often, so random access stays cheap
+DELTA_THRESHOLD = 3       # a tile is re-stored once any sample drifts by more than this
+
+Y_BYTES = TILE * TILE
+C_BYTES = (TILE // 2) * (TILE // 2)
+TILE_BYTES = Y_BYTES + 2 * C_BYTES
+
+
+def _to_tiles(frame, grid_h, grid_w):
+    """RGB frame (already padded to the tile grid) -> (tiles, TILE_BYTES) in I420 order."""
+    h, w = grid_h * TILE, grid_w * TILE
+    yuv = cv2.cvtColor(frame, cv2.COLOR_RGB2YUV_I420)
+    y = yuv[:h]
+    chroma = yuv[h:].reshape(2, h // 2, w // 2)
+    c = TILE // 2
+    y_tiles = y.reshape(grid_h, TILE, grid_w, TILE).transpose(0, 2, 1, 3).reshape(-1, Y_BYTES)
+    c_tiles = chroma.reshape(2, grid_h, c, grid_w, c).transpose(1, 3, 0, 2, 4).reshape(-1, 2 * C_BYTES)
+    return np.concatenate([y_tiles, c_tiles], axis=1)
+
+
+def _from_tiles(tiles, grid_h, grid_w):
+    """Inverse of _to_tiles: (tiles, TILE_BYTES) -> RGB frame of the padded size."""
+    h, w = grid_h * TILE, grid_w * TILE
+    c = TILE // 2
+    y = tiles[:, :Y_BYTES].reshape(grid_h, grid_w, TILE, TILE).transpose(0, 2, 1, 3).reshape(h, w)
+    chroma = tiles[:, Y_BYTES:].reshape(grid_h, grid_w, 2, c, c).transpose(2, 0, 3, 1, 4).reshape(2, h // 2, w // 2)
+    yuv = np.concatenate([y, chroma.reshape(h // 2, w)])
+    return cv2.cvtColor(yuv, cv2.COLOR_YUV2RGB_I420)
+
+
+def _to_rgb(state, grid_h, grid_w, height, width):
+    """Read-only RGB frame of the original size from a full tile state."""
+    frame = _from_tiles(state, grid_h, grid_w)
+    if frame.shape[0] != height or frame.shape[1] != width:
+        frame = np.ascontiguousarray(frame[:height, :width])
+    frame.setflags(write=False)
+    return frame
+
+
+class CompactClip:
+    """A decoded clip kept as I420 tiles: keyframes plus the tiles that change in between.
+
+    Every KEYFRAME_INTERVAL-th frame stores all tiles; other frames store
+    only tiles that differ from the reconstruction of the previous frame by
+    more than DELTA_THRESHOLD, which for a signer in front of a still
+    background is a small fraction of the frame. All tiles of the clip live in
+    one contiguous array with a parallel array of tile positions and per-frame
+    offsets into both. Frames are converted back to RGB only when read;
+    iteration and forward access reuse the previous reconstruction, so
+    playback costs one colour conversion per frame. The first and last
+    frames, which transitions read from other threads while the clip plays,
+    are also kept as RGB arrays so those reads never move the cursor.
+
+    Behaves like a read-only (count, height, width, 3) frame sequence: len(),
+    indexing (negative too), slicing (returns an array), iteration and
+    .shape / .nbytes.
+    """
+
+    __slots__ = ("height", "width", "grid_h", "grid_w", "keyframe_interval", "tiles", "positions",
+                 "offsets", "first", "last", "raw_nbytes", "_lock", "_cursor", "_state")
+
+    def __init__(self, height, width, grid_h, grid_w, keyframe_interval, tiles, positions, offsets,
+                 first, last):
+        self.height = height
+        self.width = width
+        self.grid_h = grid_h
+        self.grid_w = grid_w
+        self.keyframe_interval = keyframe_interval
+        self.tiles = tiles
+        self.positions = positions
+        self.offsets = offsets
+        self.first = first
+        self.last = last
+        self.raw_nbytes = (len(offsets) - 1) * height * width * 3
+        self._lock = threading.Lock()
+        self._cursor = -1
+        self._state = None
+
+    @classmethod
+    def encode(cls, frames, keyframe_interval=KEYFRAME_INTERVAL, threshold=DELTA_THRESHOLD):
+        """Build a compact clip from RGB frames of equal size."""
+        height, width = frames[0].shape[:2]
+        grid_h = -(-height // TILE)
+        grid_w = -(-width // TILE)
+        pad = ((0, grid_h * TILE - height), (0, grid_w * TILE - width), (0, 0))
+        all_positions = np.arange(grid_h * grid_w, dtype=np.int32)
+        chunks, positions, offsets = [], [], [0]
+        state = first = None
+        for i, frame in enumerate(frames):
+            if pad[0][1] or pad[1][1]:
+                frame = np.pad(frame, pad, mode="edge")
+            tiles = _to_tiles(np.ascontiguousarray(frame), grid_h, grid_w)
+            if state is None or i % keyframe_interval == 0:
+                changed = all_positions
+                state = tiles.copy()
+            else:
+                drift = np.abs(tiles.astype(np.int16) - state).max(axis=1)
+                changed = np.flatnonzero(drift > threshold).astype(np.int32)
+                state[changed] = tiles[changed]
+            if i == 0:
+                first = _to_rgb(state, grid_h, grid_w, height, width)
+            chunks.append(tiles[changed])
+            positions.append(changed)
+            offsets.append(offsets[-1] + len(changed))
+        last = first if len(offsets) == 2 else _to_rgb(state, grid_h, grid_w, height, width)
+        return cls(height, width, grid_h, grid_w, keyframe_interval,
+                   np.ascontiguousarray(np.concatenate(chunks)),
+                   np.concatenate(positions), np.asarray(offsets, dtype=np.int64), first, last)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def shape(self):
+        return (len(self), self.height, self.width, 3)
+
+    @property
+    def nbytes(self):
+        """Resident size, counting the reconstruction state allocated on first indexed read."""
+        state = self.grid_h * self.grid_w * TILE_BYTES
+        ends = self.first.nbytes + (self.last.nbytes if self.last is not self.first else 0)
+        return self.tiles.nbytes + self.positions.nbytes + self.offsets.nbytes + state + ends
+
+    def _apply(self, state, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        state[self.positions[start:end]] = self.tiles[start:end]
+
+    def _rgb(self, state):
+        return _to_rgb(state, self.grid_h, self.grid_w, self.height, self.width)
+
+    def __getitem__(self, index):
+        count = len(self)
+        if isinstance(index, slice):
+            indices = range(*index.indices(count))
+            if len(indices) == 0:
+                return np.empty((0, self.height, self.width, 3), dtype=np.uint8)
+            return np.stack([self[i] for i in indices])
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("frame index out of range")
+        if index == 0:
+            return self.first
+        if index == count - 1:
+            return self.last
+        with self._lock:
+            if self._state is None or index < self._cursor or index - self._cursor > self.keyframe_interval:
+                self._state = np.empty((self.grid_h * self.grid_w, TILE_BYTES), dtype=np.uint8)
+                self._cursor = index - index % self.keyframe_interval - 1
+            for i in range(self._cursor + 1, index + 1):
+                self._apply(self._state, i)
+            self._cursor = index
+            return self._rgb(self._state)
+
+    def __iter__(self):
+        state = np.empty((self.grid_h * self.grid_w, TILE_BYTES), dtype=np.uint8)
+        for i in range(len(self)):
+            self._apply(state, i)
+            yield self._rgb(state)
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import cv2
+import numpy as np
+from metrics import span
+from trim import find_trim, active_frames, TRIM_IDLE
+from gloss_index import get_gloss_index
+
+# ========== Config ==========
+VIDEO_DIR = "ISL_VIDEOS"
+STORE_DATA = "frames.bin"
+STORE_INDEX = "frames.index.json"
+VIDEO_EXTENSIONS = (".mov", ".mp4")
+
+
+# ========== Decoding ==========
+@span("decode")
+def decode_video_frames(video_path):
+    """Decode every frame of a video file into a list of RGB arrays."""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def decode_active_frames(video_path):
+    """Decode a clip without its idle lead-in and lead-out (see trim.py)."""
+    return active_frames(decode_video_frames(video_path))
+
+
+def video_fps(video_path, default=30.0):
+    """Read the native frame rate of a video, falling back to a default."""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps if fps and fps > 0 else default
+
+
+# ========== Compile Step ==========
+def compile_frame_store(video_dir=VIDEO_DIR):
+    """Decode every clip in video_dir into one packed RGB archive plus an offset index.
+
+    Frames are appended to frames.bin as raw uint8 RGB; frames.index.json maps
+    each clip file name to its byte offset, frame count, shape, fps, the
+    active segment between idle lead-in and lead-out frames (start/end), and
+    the source mtime/size so stale entries can be detected at load time.
+    """
+    data_path = os.path.join(video_dir, STORE_DATA)
+    index_path = os.path.join(video_dir, STORE_INDEX)
+    tmp_data = data_path + ".tmp"
+    tmp_index = index_path + ".tmp"
+
+    names = sorted(
+        f for f in os.listdir(video_dir) if f.lower().endswith(VIDEO_EXTENSIONS)
+    )
+    clips = {}
+    offset = 0
+    with open(tmp_data, "wb") as out:
+        for name in names:
+            path = os.path.join(video_dir, name)
+            frames = decode_video_frames(path)
+            if not frames:
+                print(f"Skipping {name}: no frames")
+                continue
+            # All frames of one clip share a shape, so the clip is one block
+            h, w = frames[0].shape[:2]
+            frames = [
+                f if f.shape[:2] == (h, w) else cv2.resize(f, (w, h))
+                for f in frames
+            ]
+            block = np.ascontiguousarray(np.stack(frames))
+            out.write(block.tobytes())
+            start, end = find_trim(block)
+            st = os.stat(path)
+            clips[name] = {
+                "offset": offset,
+                "count": len(frames),
+                "height": h,
+                "width": w,
+                "fps": video_fps(path),
+                "start": start,
+                "end": end,
+                "mtime": st.st_mtime,
+                "size": st.st_size,
+            }
+            offset += block.nbytes
+            print(f"Packed {name}: {len(frames)} frames ({w}x{h}), active {start}-{end}")
+
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "clips": clips}, f)
+    # Publish the data before the index so readers never see offsets past EOF
+    os.replace(tmp_data, data_path)
+    os.replace(tmp_index, index_path)
+    print(f"Frame store written: {len(clips)} clips, {offset / 1e6:.1f} MB")
+    return data_path, index_path
+
+
+# ========== Memory-mapped Reader ==========
+class FrameStore:
+    """Read-only view of a compiled frame archive.
+
+    The archive is mapped once with np.memmap; clips are returned as
+    (count, height, width, 3) views into the mapping, so no frames are copied
+    and every process reading the same archive shares the OS page cache.
+    Entries are checked against the clip manifest (gloss_index), so a clip
+    re-recorded after the store was compiled is a miss without a stat call.
+    """
+
+    def __init__(self, video_dir=VIDEO_DIR, index=None):
+        self.video_dir = video_dir
+        self.index = index or get_gloss_index(video_dir)
+        data_path = os.path.join(video_dir, STORE_DATA)
+        index_path = os.path.join(video_dir, STORE_INDEX)
+        with open(index_path, encoding="utf-8") as f:
+            self.clips = json.load(f)["clips"]
+        self.data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        self._drop_stale()
+
+    def _drop_stale(self):
+        """Forget clips whose source file changed or vanished since compiling."""
+        current = {}
+        with os.scandir(self.video_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    st = entry.stat()
+                    current[entry.name] = (st.st_mtime, st.st_size)
+        for name in list(self.clips):
+            meta = self.clips[name]
+            if current.get(name) != (meta["mtime"], meta["size"]):
+                del self.clips[name]
+
+    def __contains__(self, video_path):
+        return self._current(video_path) is not None
+
+    def _current(self, video_path):
+        """Index entry for a clip, or None if it was never packed or its source changed since."""
+        meta = self.clips.get(os.path.basename(video_path))
+        if meta is None:
+            return None
+        if self.index.stat(video_path) != (meta["mtime"], meta["size"]):
+            return None
+        return meta
+
+    def get(self, video_path, full=False):
+        """Return a zero-copy frame array for a clip, or None if not packed or re-recorded since.
+
+        Only the active segment recorded at compile time is returned unless
+        full is set or trimming is disabled with ISL_TRIM_IDLE=0.
+        """
+        meta = self._current(video_path)
+        if meta is None:
+            return None
+        shape = (meta["count"], meta["height"], meta["width"], 3)
+        size = shape[0] * shape[1] * shape[2] * 3
+        frames = self.data[meta["offset"]:meta["offset"] + size].reshape(shape)
+        if TRIM_IDLE and not full:
+            frames = frames[meta.get("start", 0):meta.get("end", meta["count"])]
+        return frames
+
+    def fps(self, video_path, default=30.0):
+        """Native frame rate of a packed clip, or default if it is not packed or stale."""
+        meta = self._current(video_path)
+        return meta["fps"] if meta else default
+
+
+def open_frame_store(video_dir=VIDEO_DIR, index=None):
+    """Open the compiled archive for video_dir, or return None if it was never built."""
+    if not os.path.exists(os.path.join(video_dir, STORE_INDEX)):
+        return None
+    try:
+        return FrameStore(video_dir, index)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable frame store: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    compile_frame_store(sys.argv[1] if len(sys.argv) > 1 else VIDEO_DIR)
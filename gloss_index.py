@@ -0,0 +1,200 @@
+import os
+import time
+import string
+import threading
+from metrics import span
+
+# ========== Config ==========
+VIDEO_DIR = "ISL_VIDEOS"
+VIDEO_EXTENSIONS = (".mov", ".mp4")
+REFRESH_INTERVAL = float(os.environ.get("ISL_MANIFEST_REFRESH_SECONDS", "5"))
+
+_END = object()  # trie key marking the end of a gloss
+
+
+def normalize_words(text):
+    """Split text into upper-case words with surrounding punctuation removed."""
+    words = (w.strip(string.punctuation) for w in text.upper().replace("_", " ").split())
+    return [w for w in words if w]
+
+
+class GlossIndex:
+    """Gloss-to-file manifest of the clip library.
+
+    Built from a single os.scandir pass. Clip names are split into words
+    ("THANK YOU.mov", "HOW_ARE_YOU.mov") and stored in a word trie so that
+    multi-word signs are found inside longer sentences without touching the
+    filesystem. At most once every REFRESH_INTERVAL seconds the directory
+    mtime is checked and, only if it changed, the manifest is rebuilt;
+    otherwise only the mtime and size of the known clips are re-read, since
+    overwriting a file in place leaves the directory unchanged. Every other
+    lookup, including stat() and mtime(), is a dictionary hit.
+    """
+
+    def __init__(self, video_dir=VIDEO_DIR, refresh_interval=REFRESH_INTERVAL):
+        self.video_dir = video_dir
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._checked_at = 0.0
+        self.glosses = {}
+        self.files = {}
+        self._trie = {}
+        self._scan()
+
+    def _scan(self):
+        try:
+            dir_mtime = os.stat(self.video_dir).st_mtime
+            with os.scandir(self.video_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except FileNotFoundError:
+            print(f"Clip library {self.video_dir} not found; every word will be spelled out")
+            self._checked_at = time.monotonic()
+            return
+
+        glosses = {}
+        files = {}
+        trie = {}
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() not in VIDEO_EXTENSIONS or not entry.is_file():
+                continue
+            st = entry.stat()
+            files[entry.path] = (st.st_mtime, st.st_size)
+            words = normalize_words(stem)
+            if not words:
+                continue
+            gloss = " ".join(words)
+            # Prefer .mov, which is what the players were built around
+            if gloss in glosses and ext.lower() != ".mov":
+                continue
+            glosses[gloss] = entry.path
+            node = trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[_END] = entry.path
+
+        # Swap in whole tables so concurrent readers never see a partial build
+        self.glosses, self.files, self._trie = glosses, files, trie
+        self._dir_mtime = dir_mtime
+        self._checked_at = time.monotonic()
+
+    def refresh(self, force=False):
+        """Rescan if the directory changed; checks at most once per refresh interval."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                dir_mtime = os.stat(self.video_dir).st_mtime
+            except FileNotFoundError:
+                dir_mtime = None
+            if not force and dir_mtime == self._dir_mtime:
+                self._restat()
+                return False
+            self._scan()
+            return True
+
+    def _restat(self):
+        """Re-read mtime and size of every known clip."""
+        files = {}
+        for path in self.files:
+            try:
+                st = os.stat(path)
+            except OSError:
+                # A removal changes the directory mtime, so the next pass rescans
+                continue
+            files[path] = (st.st_mtime, st.st_size)
+        self.files = files
+
+    def __contains__(self, gloss):
+        self.refresh()
+        return gloss in self.glosses
+
+    def __len__(self):
+        return len(self.glosses)
+
+    def get(self, gloss):
+        self.refresh()
+        return self.glosses.get(gloss)
+
+    def letter(self, char):
+        """Clip path for a single letter, or None."""
+        return self.get(char.upper())
+
+    def labels(self):
+        """Sorted list of every gloss in the library."""
+        self.refresh()
+        return sorted(self.glosses)
+
+    def stat(self, path):
+        """(mtime, size) of a clip as of the last refresh, or None if it is not in the library."""
+        self.refresh()
+        entry = self.files.get(path)
+        if entry is None:
+            entry = self.files.get(os.path.join(self.video_dir, os.path.basename(path)))
+        return entry
+
+    def mtime(self, path):
+        """Modification time of a clip as of the last refresh, or None."""
+        entry = self.stat(path)
+        return entry[0] if entry else None
+
+    def token(self, path):
+        """name@mtime:size naming one version of a clip, or None if it is not in the library."""
+        entry = self.stat(path)
+        if entry is None:
+            return None
+        return f"{os.path.basename(path)}@{entry[0]!r}:{entry[1]}"
+
+    def extendable(self, words):
+        """Whether words are the start of a longer multi-word gloss."""
+        node = self._trie
+        for word in words:
+            node = node.get(word)
+            if node is None:
+                return False
+        return any(key is not _END for key in node)
+
+    @span("gloss_lookup")
+    def match(self, text):
+        """Greedy longest-match tokenization of text against the known glosses.
+
+        Returns a list of (gloss, path) segments in order; path is None for a
+        word that has no clip and needs to be spelled out.
+        """
+        self.refresh()
+        trie = self._trie
+        words = normalize_words(text)
+        segments = []
+        i = 0
+        while i < len(words):
+            node = trie
+            best_end, best_path = None, None
+            j = i
+            while j < len(words) and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if _END in node:
+                    best_end, best_path = j, node[_END]
+            if best_path is None:
+                segments.append((words[i], None))
+                i += 1
+            else:
+                segments.append((" ".join(words[i:best_end]), best_path))
+                i = best_end
+        return segments
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_gloss_index(video_dir=VIDEO_DIR):
+    """Return the shared manifest for video_dir, building it on first use."""
+    with _indexes_lock:
+        index = _indexes.get(video_dir)
+        if index is None:
+            index = _indexes[video_dir] = GlossIndex(video_dir)
+        return index
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ========== Config ==========
+MANIFEST_FILE = ".ingest-manifest.json"
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+HASH_CHUNK = 1 << 20
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ffmpeg_threads(workers):
+    """Encoder threads per ffmpeg process so that all workers together fill the CPUs once."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def run_ffmpeg(args, cwd=None):
+    """Run one ffmpeg command; raises RuntimeError with ffmpeg's own message on failure."""
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", *args]
+    result = subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip()
+                           else f"ffmpeg exited with status {result.returncode}")
+
+
+class IngestManifest:
+    """Per-folder record of finished jobs, so an interrupted ingest resumes where it stopped.
+
+    An output counts as done when it exists and was produced from inputs with
+    the same content hashes by the same recipe. Hashes are reused while a
+    file's size and mtime are unchanged. The manifest is rewritten atomically
+    after every finished job.
+    """
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self.sources = {}
+        self.outputs = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.sources = data.get("sources", {})
+            self.outputs = data.get("outputs", {})
+        except (OSError, ValueError):
+            pass
+
+    def digest(self, path):
+        stat = os.stat(path)
+        name = os.path.basename(path)
+        with self._lock:
+            entry = self.sources.get(name)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        sha = file_digest(path)
+        with self._lock:
+            self.sources[name] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha}
+        return sha
+
+    def job_key(self, job):
+        parts = [job.recipe] + [self.digest(p) for p in job.inputs]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def is_done(self, job, key):
+        with self._lock:
+            return self.outputs.get(os.path.basename(job.output)) == key and os.path.exists(job.output)
+
+    def mark_done(self, job, key):
+        with self._lock:
+            self.outputs[os.path.basename(job.output)] = key
+            data = json.dumps({"sources": self.sources, "outputs": self.outputs}, indent=1, sort_keys=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+
+
+class IngestJob:
+    """One output file built from inputs by build(inputs, partial_output, workdir).
+
+    recipe identifies the command line (filters, codec settings); changing it
+    invalidates earlier outputs. build writes to partial_output, which is
+    renamed over output only on success, and may leave scratch files such as
+    vidstab transforms in workdir.
+    """
+
+    def __init__(self, inputs, output, recipe, build):
+        self.inputs = [os.path.abspath(p) for p in inputs]
+        self.output = os.path.abspath(output)
+        self.recipe = recipe
+        self.build = build
+
+    @property
+    def name(self):
+        return os.path.basename(self.output)
+
+    def run(self):
+        base, ext = os.path.splitext(self.output)
+        partial = f"{base}.part{ext}"
+        try:
+            with tempfile.TemporaryDirectory(prefix="isl-ingest-") as workdir:
+                self.build(self.inputs, partial, workdir)
+            os.replace(partial, self.output)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+
+def run_jobs(jobs, manifest, workers=DEFAULT_WORKERS, label="Processed"):
+    """Run jobs on a bounded thread pool (each job drives its own ffmpeg processes).
+
+    Jobs whose output is already recorded in the manifest with matching input
+    hashes are skipped. Prints one line per file and a throughput summary;
+    returns a stats dict.
+    """
+    stats = {"total": len(jobs), "done": 0, "skipped": 0, "failed": 0, "bytes_in": 0, "seconds": 0.0}
+    if not jobs:
+        return stats
+    width = len(str(len(jobs)))
+    start = time.perf_counter()
+    finished = 0
+
+    def work(job):
+        key = manifest.job_key(job)
+        if manifest.is_done(job, key):
+            return "skipped", 0.0
+        job_start = time.perf_counter()
+        job.run()
+        manifest.mark_done(job, key)
+        return "done", time.perf_counter() - job_start
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="isl-ingest")
+    try:
+        futures = {pool.submit(work, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            finished += 1
+            prefix = f"[{finished:>{width}}/{len(jobs)}] {job.name}"
+            try:
+                status, seconds = future.result()
+            except (RuntimeError, OSError) as e:
+                stats["failed"] += 1
+                print(f"{prefix}: FAILED ({e})")
+                continue
+            stats[status] += 1
+            if status == "skipped":
+                print(f"{prefix}: up to date")
+                continue
+            stats["bytes_in"] += sum(os.path.getsize(p) for p in job.inputs)
+            print(f"{prefix}: {label.lower()} in {seconds:.1f}s")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    rate = stats["done"] / elapsed if elapsed else 0.0
+    mb_rate = stats["bytes_in"] / (1024 * 1024) / elapsed if elapsed else 0.0
+    print(f"{label} {stats['done']}, skipped {stats['skipped']}, failed {stats['failed']} "
+          f"of {stats['total']} in {elapsed:.1f}s ({rate:.2f} files/s, {mb_rate:.1f} MB/s in, {workers} workers)")
+    return stats
+
+
+def list_videos(folder, extension=".mp4", exclude_prefixes=()):
+    """Sorted source clips in folder, skipping partial outputs and generated files."""
+    return sorted(
+        f for f in os.listdir(folder)
+        if f.lower().endswith(extension) and ".part." not in f and not f.startswith(tuple(exclude_prefixes))
+    )
@@ -0,0 +1,267 @@
+import io
+import os
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# ========== Config ==========
+# Histogram bucket upper bounds in milliseconds (Prometheus "le" labels)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RESERVOIR = 2048            # most recent samples kept per stage for percentiles
+METRICS_PORT = os.environ.get("ISL_METRICS_PORT")
+PROFILERS = ("off", "cprofile", "pyinstrument")
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus a window of recent samples for one stage."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=RESERVOIR)
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.samples.append(ms)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        if not self.samples:
+            return [0.0] * len(qs)
+        return [float(v) for v in np.percentile(np.fromiter(self.samples, float), qs)]
+
+
+class Metrics:
+    """Process-wide latency histograms keyed by pipeline stage, plus named gauges and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._gauges = {}
+        self._counters = {}
+        self.started = time.time()
+
+    def observe(self, stage, ms):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def increment(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def values(self):
+        """Current gauges and counters (counters suffixed _total), by name."""
+        with self._lock:
+            values = dict(self._gauges)
+            values.update((f"{name}_total", n) for name, n in self._counters.items())
+        return dict(sorted(values.items()))
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._gauges = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        """One row per stage: count, mean, p50/p95/p99 and max in milliseconds."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            rows = []
+            for stage, h in items:
+                p50, p95, p99 = h.percentiles()
+                rows.append({
+                    "stage": stage,
+                    "count": h.count,
+                    "mean_ms": round(h.total / h.count, 2),
+                    "p50_ms": round(p50, 2),
+                    "p95_ms": round(p95, 2),
+                    "p99_ms": round(p99, 2),
+                    "max_ms": round(h.max, 2),
+                })
+        return rows
+
+    def prometheus_text(self):
+        """Render every stage as a Prometheus histogram in seconds."""
+        lines = [
+            "# HELP isl_stage_seconds Time spent in each pipeline stage.",
+            "# TYPE isl_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS_MS, h.counts):
+                    cumulative += n
+                    lines.append(f'isl_stage_seconds_bucket{{stage="{stage}",le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'isl_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'isl_stage_seconds_sum{{stage="{stage}"}} {h.total / 1000:.6f}')
+                lines.append(f'isl_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"# TYPE isl_{name} gauge")
+                lines.append(f"isl_{name} {value}")
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE isl_{name}_total counter")
+                lines.append(f"isl_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+_local = threading.local()
+_trace_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _metrics
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as one observation of stage.
+
+    The duration also adds to the current trace() of this thread, if any.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        _metrics.observe(stage, ms)
+        stages = getattr(_local, "stages", None)
+        if stages is not None:
+            # Worker threads may add to the same trace
+            with _trace_lock:
+                stages[stage] = stages.get(stage, 0.0) + ms
+
+
+def current_trace():
+    """The stage dict of this thread's trace(), or None."""
+    return getattr(_local, "stages", None)
+
+
+@contextmanager
+def trace(stages=None):
+    """Collect per-stage totals for one request on this thread.
+
+    Yields a dict of stage -> milliseconds that fills in as spans finish;
+    nested traces share the outermost dict. Work handed to another thread
+    joins the request's trace by passing current_trace() as stages there.
+    """
+    outer = getattr(_local, "stages", None)
+    if outer is not None:
+        yield outer
+        return
+    _local.stages = {} if stages is None else stages
+    try:
+        yield _local.stages
+    finally:
+        _local.stages = None
+
+
+# ========== Profiling ==========
+class SessionProfiler:
+    """Profiles one script run with cProfile or pyinstrument; stop() returns a text report."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self, limit=40):
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        import pstats
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+def start_profiler(kind):
+    """Start a profiler of the given kind, or return None when profiling is off."""
+    if kind not in PROFILERS[1:]:
+        return None
+    try:
+        return SessionProfiler(kind)
+    except ImportError:
+        print(f"{kind} is not installed; profiling disabled")
+        return None
+    except ValueError as e:
+        # cProfile refuses to start while another profiler is active (Python 3.12+)
+        print(f"{kind} could not start: {e}; profiling disabled")
+        return None
+
+
+@contextmanager
+def session_profiler(state):
+    """Profile one Streamlit script run when state["profiler"] names a profiler.
+
+    st.rerun and st.stop end a run with an exception, so the report is stored
+    in state["profile_report"] on the way out either way.
+    """
+    profiler = start_profiler(state.get("profiler"))
+    try:
+        yield profiler
+    finally:
+        if profiler is not None:
+            state["profile_report"] = profiler.stop()
+
+
+# ========== Prometheus Endpoint ==========
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics on a background thread (once per process)."""
+    port = port or METRICS_PORT
+    with _server_lock:
+        if _server is None and port:
+            _serve(int(port))
+        return _server
+
+
+def _serve(port):
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = _metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    except OSError as e:
+        # Another app on this machine already serves the port
+        print(f"Metrics endpoint not started on port {port}: {e}")
+        return
+    threading.Thread(target=_server.serve_forever, name="isl-metrics", daemon=True).start()
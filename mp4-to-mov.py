@@ -1,31 +1,42 @@
 import os
-import subprocess
-import sys
+import shutil
+import argparse
 
-def convert_mp4_to_mov(folder_path):
+from ingest import IngestJob, IngestManifest, run_jobs, run_ffmpeg, list_videos, DEFAULT_WORKERS
+
+RECIPE = "mov:q0"
+
+
+def convert_job(input_path, output_path):
+    def build(inputs, output, workdir):
+        run_ffmpeg(['-i', inputs[0], '-q:v', '0', '-q:a', '0', output])
+    return IngestJob([input_path], output_path, RECIPE, build)
+
+
+def convert_mp4_to_mov(folder_path, workers=DEFAULT_WORKERS):
     if not os.path.exists(folder_path):
         print("Error: The specified folder does not exist.")
         return
-    
-    files = [f for f in os.listdir(folder_path) if f.endswith('.mp4')]
-    
+    if not shutil.which("ffmpeg"):
+        print("Error: ffmpeg was not found on PATH.")
+        return
+
+    files = list_videos(folder_path, '.mp4', exclude_prefixes=('stabilized_', 'transition_'))
+
     if not files:
         print("No MP4 files found in the folder.")
         return
-    
-    for file in files:
-        input_path = os.path.join(folder_path, file)
-        output_path = os.path.join(folder_path, os.path.splitext(file)[0] + '.mov')
-        
-        command = [
-            'ffmpeg', '-i', input_path, '-q:v', '0', '-q:a', '0', output_path
-        ]
-        
-        try:
-            subprocess.run(command, check=True)
-            print(f"Converted: {file} -> {os.path.basename(output_path)}")
-        except subprocess.CalledProcessError:
-            print(f"Error converting {file}")
+
+    jobs = [
+        convert_job(os.path.join(folder_path, file), os.path.join(folder_path, os.path.splitext(file)[0] + '.mov'))
+        for file in files
+    ]
+    return run_jobs(jobs, IngestManifest(folder_path), workers, label="Converted")
 
 if __name__ == "__main__":
-        convert_mp4_to_mov(r"C:\Users\amvk2\OneDrive\Documents\Santhu mini project\ISL_VIDEOS")
+    parser = argparse.ArgumentParser(description="Convert every MP4 in a folder to MOV, in parallel. "
+                                                 "Files already converted from the same content are skipped.")
+    parser.add_argument("folder", help="folder of .mp4 clips (e.g. ISL_VIDEOS)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ffmpeg jobs at once (default: half the CPUs)")
+    args = parser.parse_args()
+    convert_mp4_to_mov(args.folder, args.workers)
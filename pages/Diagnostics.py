@@ -0,0 +1,49 @@
+import streamlit as st
+from metrics import get_metrics, PROFILERS
+from clip_cache import get_clip_cache
+from translation_log import get_translation_log
+
+# ========== Diagnostics Page ==========
+# Streamlit lists this page next to whichever app (Final.py, app1.py, lang.py)
+# is running; the numbers are for the whole server process.
+st.title("🩺 Diagnostics")
+
+metrics = get_metrics()
+rows = metrics.snapshot()
+
+st.markdown("### Stage latency")
+if rows:
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+else:
+    st.info("No timings yet. Translate a sentence in the app and come back.")
+
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Download Prometheus metrics", metrics.prometheus_text(),
+                       file_name="isl_metrics.prom", mime="text/plain")
+with col2:
+    if st.button("Reset timings"):
+        metrics.reset()
+        st.rerun()
+
+values = metrics.values()
+if values:
+    st.markdown("### Playback and service")
+    st.dataframe([{"name": k, "value": v} for k, v in values.items()], use_container_width=True, hide_index=True)
+
+st.markdown("### Caches and logging")
+st.write(get_clip_cache().describe())
+log = get_translation_log()
+st.write(f"Log rows written: {log.written}, dropped: {log.dropped}"
+         + (f", last error: {log.error}" if log.error else ""))
+
+st.markdown("### Profiling")
+current = st.session_state.get("profiler", "off")
+st.session_state.profiler = st.selectbox(
+    "Profile every run of the app in this session", PROFILERS, index=PROFILERS.index(current))
+report = st.session_state.get("profile_report")
+if report:
+    st.caption("Last profiled run")
+    st.code(report, language="text")
+elif st.session_state.profiler != "off":
+    st.info("Go back to the app and use it; the report for its next run will show here.")
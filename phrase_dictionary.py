@@ -0,0 +1,177 @@
+import os
+import sys
+import difflib
+import threading
+from collections import deque
+from translation import normalize_text
+
+# ========== Config ==========
+PHRASES_FILE = os.environ.get("ISL_PHRASES_FILE", "phrases.tsv")
+FUZZY_CUTOFF = 0.85        # similarity needed for a whole-utterance close match
+FUZZY_LENGTH_SLACK = 0.2   # only compare against keys within this relative length
+
+
+def load_phrases(path):
+    """Read 'phrase<TAB>GLOSS' lines; blank lines and # comments are skipped."""
+    phrases = {}
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            phrase, sep, gloss = line.partition("\t")
+            if not sep or not gloss.strip():
+                print(f"{path}:{line_no}: expected 'phrase<TAB>GLOSS', skipping")
+                continue
+            phrases[phrase] = gloss.strip().upper()
+    return phrases
+
+
+class PhraseDictionary:
+    """Phrase-to-gloss dictionary with an Aho-Corasick automaton over folded text.
+
+    Keys and utterances both go through normalize_text, so spelling variants
+    that differ only in Unicode form, case, punctuation or spacing collide.
+    segment() finds every known phrase inside an utterance in one pass over
+    its characters, independent of the number of entries, and keeps the
+    leftmost-longest non-overlapping matches that sit on word boundaries.
+    """
+
+    def __init__(self, phrases=None):
+        self.phrases = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._by_length = {}
+        for phrase, gloss in (phrases or {}).items():
+            self._add(phrase, gloss)
+        self._link()
+
+    @classmethod
+    def from_file(cls, path=PHRASES_FILE):
+        if not os.path.exists(path):
+            print(f"Phrase dictionary {path} not found; everything will be machine translated")
+            return cls()
+        return cls(load_phrases(path))
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _add(self, phrase, gloss):
+        key = normalize_text(phrase)
+        if not key:
+            return
+        self.phrases[key] = gloss
+        self._by_length.setdefault(len(key), []).append(key)
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node] = [len(key)]
+
+    def _link(self):
+        """Breadth-first pass that sets failure links and merges their outputs."""
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                pending.append(child)
+
+    def find(self, text):
+        """Return (start, end, gloss) for every whole-word phrase in folded text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        node = 0
+        last = len(text)
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            if end != last and text[end] != " ":
+                continue
+            for length in out[node]:
+                start = end - length
+                if start == 0 or text[start - 1] == " ":
+                    matches.append((start, end, self.phrases[text[start:end]]))
+        return matches
+
+    def _fuzzy(self, key):
+        slack = max(1, int(len(key) * FUZZY_LENGTH_SLACK))
+        candidates = []
+        for length in range(len(key) - slack, len(key) + slack + 1):
+            candidates.extend(self._by_length.get(length, ()))
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return self.phrases[close[0]] if close else None
+
+    def segment(self, text):
+        """Split an utterance into (piece, gloss) runs in order.
+
+        gloss is None for stretches with no dictionary phrase; those still
+        need translating. An utterance with no exact phrase at all is also
+        tried as a whole against similar-length keys, to absorb small
+        recognition slips.
+        """
+        key = normalize_text(text)
+        if not key:
+            return []
+        chosen = []
+        position = 0
+        # Leftmost-longest: sort by start, then prefer the longer phrase
+        for start, end, gloss in sorted(self.find(key), key=lambda m: (m[0], m[0] - m[1])):
+            if start >= position:
+                chosen.append((start, end, gloss))
+                position = end
+        if not chosen:
+            gloss = self._fuzzy(key) if self.phrases else None
+            return [(key, gloss)]
+        segments = []
+        position = 0
+        for start, end, gloss in chosen:
+            gap = key[position:start].strip()
+            if gap:
+                segments.append((gap, None))
+            segments.append((key[start:end], gloss))
+            position = end
+        tail = key[position:].strip()
+        if tail:
+            segments.append((tail, None))
+        return segments
+
+
+_dictionaries = {}
+_dictionaries_lock = threading.Lock()
+
+
+def get_phrase_dictionary(path=PHRASES_FILE):
+    """Return the shared dictionary for path, reloading it when the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _dictionaries_lock:
+        entry = _dictionaries.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = _dictionaries[path] = (mtime, PhraseDictionary.from_file(path))
+        return entry[1]
+
+
+if __name__ == "__main__":
+    # Try an utterance against the dictionary: python phrase_dictionary.py "नमस्ते, आप कैसे हैं"
+    dictionary = get_phrase_dictionary()
+    print(f"{len(dictionary)} phrases loaded from {PHRASES_FILE}")
+    for piece, gloss in dictionary.segment(" ".join(sys.argv[1:])):
+        print(f"  {piece!r} -> {gloss or '(translate)'}")
@@ -0,0 +1,245 @@
+import threading
+from frame_store import open_frame_store, decode_active_frames, video_fps
+from clip_cache import get_clip_cache
+from gloss_index import get_gloss_index, normalize_words
+from transitions import get_transition_engine, open_transition_library
+from render import assemble_sentence, prefetch_clips, encode_frames, RENDER_FPS, PAUSE_SECONDS
+from render_cache import get_render_cache, make_key
+from audio_capture import get_audio_capture
+from speech import StreamingListener, get_speech_backend
+from translation import translate_utterance, get_translation_service
+from phrase_dictionary import get_phrase_dictionary
+from translation_log import get_translation_log
+from metrics import start_metrics_server
+from render_client import get_render_client, ServiceUnavailable, RequestRejected
+
+# ========== Config ==========
+VIDEO_DIR = "ISL_VIDEOS"
+TRANSITION_MODES = ("none", "crossfade", "forward", "bidirectional")
+
+
+class SignPipeline:
+    """Speech/text to Indian Sign Language, independent of any UI.
+
+    Owns nothing itself: it wires together the process-wide gloss index,
+    frame store, clip cache, transition engine, render cache, speech
+    backends, translator and log writer for one clip library, and returns
+    plain data (clip lists, frame arrays and iterators, encoded bytes).
+    Streamlit apps, batch jobs and benchmarks all drive the same object.
+    With a remote RenderClient, render() is delegated to render_service.py
+    and only falls back to encoding locally when the service is unavailable.
+    """
+
+    def __init__(self, video_dir=VIDEO_DIR, remote=None):
+        self.video_dir = video_dir
+        self.remote = remote
+        self.index = get_gloss_index(video_dir)
+        self.store = open_frame_store(video_dir, self.index)
+        self.clip_cache = get_clip_cache()
+        self.render_cache = get_render_cache()
+        self.engine = get_transition_engine()
+        if self.engine.index is None:
+            self.engine.index = self.index
+        if self.engine.library is None:
+            self.engine.library = open_transition_library(video_dir, self.index)
+        self._fps = {}
+
+    def start(self):
+        """Start the long-lived services: the microphone, translation memory and, if configured, /metrics."""
+        get_audio_capture()
+        # Load the translation memory now rather than on the first non-English utterance
+        get_translation_service()
+        start_metrics_server()
+        return self
+
+    # ---------- Text to clips ----------
+    def resolve(self, text):
+        """Map text to clip paths; returns (clips, missing_letters).
+
+        Multi-word signs are matched greedily, longest first; other words are
+        spelled letter by letter, followed by a pause (None) unless they end
+        the sentence. missing_letters lists letters that have no clip.
+        """
+        clips, missing, _ = self._segment_clips(self.index.match(text))
+        return clips, missing
+
+    def _segment_clips(self, segments, pause_before=False):
+        """(clips, missing, ends_spelled) for match() segments, pausing after spelled words."""
+        clips = []
+        missing = []
+        spelled = pause_before
+        for word, clip in segments:
+            if spelled:
+                clips.append(None)
+            spelled = clip is None
+            if clip is not None:
+                clips.append(clip)
+                continue
+            for char in word:
+                if not char.isalpha():
+                    continue
+                letter = self.index.letter(char)
+                if letter is not None:
+                    clips.append(letter)
+                else:
+                    missing.append(char.upper())
+        return clips, missing, spelled
+
+    def _settle(self, words):
+        """Split words into match() segments that are final and the words still undecided.
+
+        Words from the first segment boundary at which the rest could still grow
+        into a longer multi-word gloss are held back for the next batch.
+        """
+        segments = self.index.match(" ".join(words))
+        start = 0
+        for i, (gloss, _) in enumerate(segments):
+            if self.index.extendable(words[start:]):
+                return segments[:i], words[start:]
+            start += len(gloss.split())
+        return segments, []
+
+    def resolve_stream(self, batches):
+        """Yield (words, clips, missing) for batches of newly stable words, e.g. from stream_words.
+
+        Clips match what resolve() gives for the whole text: a word that may
+        begin a multi-word sign ("HOW" of "HOW ARE YOU") waits for the words
+        after it, and spelled words keep their pause across batches. The
+        held-back words are resolved when the stream ends.
+        """
+        pending = []
+        spelled = False
+        for words in batches:
+            pending.extend(normalize_words(" ".join(words)))
+            segments, pending = self._settle(pending)
+            clips, missing, spelled = self._segment_clips(segments, spelled) if segments else ([], [], spelled)
+            yield words, clips, missing
+        if pending:
+            clips, missing, _ = self._segment_clips(self.index.match(" ".join(pending)), spelled)
+            yield [], clips, missing
+
+    def load(self, video_path):
+        """Active frames of one clip: a view into the frame store, else the decoded clip cache."""
+        if self.store is not None:
+            frames = self.store.get(video_path)
+            if frames is not None:
+                return frames
+        return self.clip_cache.get(video_path, decode_active_frames, mtime=self.index.mtime(video_path))
+
+    def fps(self, video_path):
+        """Native frame rate of a clip, from the frame store index when it is packed."""
+        if self.store is not None:
+            fps = self.store.fps(video_path, default=None)
+            if fps is not None:
+                return fps
+        fps = self._fps.get(video_path)
+        if fps is None:
+            fps = self._fps[video_path] = video_fps(video_path)
+        return fps
+
+    # ---------- Transitions ----------
+    def transition(self, frame1, frame2, pair=None, mode="forward", steps=10):
+        """Transition frames from frame1 into frame2 (empty for mode "none")."""
+        if mode == "none":
+            return []
+        return self.engine.transition(frame1, frame2, pair=pair, steps=steps, mode=mode)
+
+    def transition_callback(self, mode):
+        """transition(last_frame, first_frame, pair) for the sentence pipeline, or None."""
+        if mode == "none":
+            return None
+
+        def transition(last_frame, first_frame, pair):
+            return self.engine.transition(last_frame, first_frame, pair=pair, mode=mode)
+        return transition
+
+    # ---------- Playback and rendering ----------
+    def clips(self, clips, mode="forward", after=None):
+        """Yield (clip, transition_frames, frames) per clip, prefetching ahead; None clips are pauses."""
+        return prefetch_clips(clips, self.load, self.transition_callback(mode), after=after)
+
+    def play(self, clips, show, clock, mode="forward", after=None, on_pause=None):
+        """Show a sentence frame by frame through show(frame), paced by a PlaybackClock.
+
+        Each clip and the transition into it play at the clip's own frame
+        rate times the clock's speed; a None clip calls on_pause(), if given,
+        and holds the picture for PAUSE_SECONDS. after is the clip played
+        just before these (e.g. by the previous batch of a stream), so the
+        first clip transitions from it. Returns the last clip played.
+        """
+        last = after
+        for clip, transition_frames, frames in self.clips(clips, mode, after):
+            if clip is None:
+                if on_pause is not None:
+                    on_pause()
+                clock.pause(PAUSE_SECONDS)
+                continue
+            if len(frames) == 0:
+                continue
+            fps = self.fps(clip)
+            if transition_frames is not None:
+                clock.play(transition_frames, show, fps)
+            clock.play(frames, show, fps)
+            last = clip
+        return last
+
+    def frames(self, clips, mode="forward", fps=RENDER_FPS):
+        """Every frame of a sentence in display order, pauses held for PAUSE_SECONDS."""
+        return assemble_sentence(clips, self.load, self.transition_callback(mode),
+                                 hold_frames=int(PAUSE_SECONDS * fps))
+
+    def render(self, clips, speed_factor=1.0, mode="forward"):
+        """Encode a sentence to (data, mime), served from the render cache when possible."""
+        if self.remote is not None:
+            try:
+                return self.remote.render(clips, speed_factor, mode)
+            except (ServiceUnavailable, RequestRejected) as e:
+                print(f"{e}; rendering locally")
+        key = make_key(clips, speed_factor, mode, mtime_of=self.index.mtime)
+        cached = self.render_cache.get(key)
+        if cached is not None:
+            return cached
+        fps = RENDER_FPS * speed_factor
+        data, mime = encode_frames(self.frames(clips, mode, fps), fps)
+        self.render_cache.put(key, data, mime)
+        return data, mime
+
+    # ---------- Speech and translation ----------
+    def listen(self, timeout=10, phrase_time_limit=None):
+        """Block for the next utterance from the shared microphone (sr.AudioData)."""
+        return get_audio_capture().listen(timeout=timeout, phrase_time_limit=phrase_time_limit)
+
+    def recognize(self, audio, language, backend=None):
+        return get_speech_backend(backend).recognize(audio, language).strip()
+
+    def stream_words(self, language, backend=None, timeout=10, phrase_time_limit=8):
+        """Iterate over lists of newly stable words while the user is speaking."""
+        listener = StreamingListener(get_speech_backend(backend), language=language,
+                                     timeout=timeout, phrase_time_limit=phrase_time_limit)
+        return listener.listen()
+
+    def translate(self, text, language):
+        """Upper-case English for text spoken in language; returns (english, from_dictionary)."""
+        return translate_utterance(text, language, get_phrase_dictionary())
+
+    def log(self, text, app=None, language=None, source_text=None, latency=None):
+        """Queue a row for the translation log, with the clip sequence text resolves to."""
+        clips = [clip or word for word, clip in self.index.match(text)]
+        get_translation_log().log(text, app=app, language=language, source_text=source_text,
+                                  clips=clips, latency=latency)
+
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(video_dir=VIDEO_DIR, start=True):
+    """Return the shared pipeline for video_dir, building it once per process."""
+    with _pipelines_lock:
+        pipeline = _pipelines.get(video_dir)
+        if pipeline is None:
+            pipeline = _pipelines[video_dir] = SignPipeline(video_dir, remote=get_render_client())
+    if start:
+        # Cheap when already running; restarts the microphone if it failed
+        pipeline.start()
+    return pipeline
@@ -0,0 +1,92 @@
+import math
+import time
+from metrics import get_metrics, span
+
+# ========== Config ==========
+MAX_DISPLAY_FPS = 30       # frames pushed to the browser per second at most
+MAX_CATCHUP_SECONDS = 0.5  # lag after which the clock re-anchors instead of dropping frames
+
+
+class PlaybackClock:
+    """Paces frame pushes against absolute deadlines instead of sleeping after each one.
+
+    Each clip plays at its native fps times speed_factor. Frame i of a clip is
+    due at start + i / (fps * speed); time spent pushing a frame is absorbed by
+    sleeping only until the next deadline. When the source rate exceeds
+    max_fps, every n-th frame is shown (decimation); when pushes fall behind
+    by more than one display slot, late frames are dropped to catch up, so
+    wall-clock duration follows the requested speed. Clips, transitions and
+    pauses played on one clock share its timeline.
+    """
+
+    def __init__(self, speed_factor=1.0, max_fps=MAX_DISPLAY_FPS, clock=time.perf_counter, sleep=time.sleep):
+        self.speed_factor = speed_factor
+        self.max_fps = max_fps
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+        self.playing = 0.0
+        self.shown = 0
+        self.dropped = 0
+        self.target_fps = 0.0
+
+    def _anchor(self):
+        now = self.clock()
+        if self.next_deadline is None or now - self.next_deadline > MAX_CATCHUP_SECONDS:
+            # First clip, or a long stall (e.g. waiting on the microphone): start a fresh timeline
+            self.next_deadline = now
+        return now
+
+    def play(self, frames, show, fps):
+        """Call show(frame) for frames on schedule; returns the last frame shown."""
+        count = len(frames)
+        if count == 0:
+            return None
+        rate = fps * self.speed_factor
+        stride = max(1, math.ceil(rate / self.max_fps))
+        self.target_fps = rate / stride
+        began = self._anchor()
+        start = self.next_deadline
+        last = None
+        i = 0
+        while i < count:
+            deadline = start + i / rate
+            now = self.clock()
+            if now < deadline:
+                self.sleep(deadline - now)
+            elif now - deadline >= stride / rate:
+                # More than a display slot late: skip to the frame due now
+                due = min(count - 1, int((now - start) * rate))
+                self.dropped += (due - i) // stride
+                i = due
+            last = frames[i]
+            with span("display"):
+                show(last)
+            self.shown += 1
+            i += stride
+        self.next_deadline = start + count / rate
+        self.playing += max(self.clock(), self.next_deadline) - began
+        return last
+
+    def pause(self, seconds):
+        """Hold the current picture for seconds (pauses are not sped up, as in rendered videos)."""
+        self._anchor()
+        self.next_deadline += seconds
+        delay = self.next_deadline - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+    @property
+    def achieved_fps(self):
+        """Frames shown per second of clip playback, pauses excluded."""
+        return self.shown / self.playing if self.playing > 0 else 0.0
+
+    def report(self):
+        """Publish target vs achieved fps and dropped frames; returns a one-line summary."""
+        metrics = get_metrics()
+        metrics.set_gauge("playback_target_fps", round(self.target_fps, 1))
+        metrics.set_gauge("playback_achieved_fps", round(self.achieved_fps, 1))
+        metrics.increment("playback_frames_shown", self.shown)
+        metrics.increment("playback_frames_dropped", self.dropped)
+        return (f"Playback {self.achieved_fps:.1f} / {self.target_fps:.1f} fps, "
+                f"{self.dropped} frames dropped")
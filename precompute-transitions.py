@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+import numpy as np
+
+from frame_store import open_frame_store, decode_active_frames
+from gloss_index import GlossIndex
+from transitions import TransitionEngine, LIBRARY_FILE, library_key, is_current_key
+
+# Set per worker process by init_worker
+_store = None
+_engine = None
+
+
+def clip_sequence(text, index):
+    """Resolve text to clip file names the way stream_videos does: phrase clip, else letters."""
+    clips = []
+    for word, path in index.match(text):
+        if path is not None:
+            clips.append(path)
+        else:
+            clips.extend(index.get(c) for c in word if c.isalpha() and c in index)
+    return [os.path.basename(c) for c in clips]
+
+
+def rank_pairs(db_path, index):
+    """Count adjacent clip pairs over every phrase in the recognition log."""
+    counts = Counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT recognized_text FROM logs").fetchall()
+    finally:
+        conn.close()
+    for (text,) in rows:
+        if not text:
+            continue
+        clips = clip_sequence(text, index)
+        counts.update(zip(clips, clips[1:]))
+    return counts
+
+
+def init_worker(video_dir):
+    global _store, _engine
+    _store = open_frame_store(video_dir)
+    _engine = TransitionEngine()
+
+
+def load_clip(video_dir, name):
+    path = os.path.join(video_dir, name)
+    if _store is not None:
+        frames = _store.get(path)
+        if frames is not None:
+            return frames
+    return decode_active_frames(path)
+
+
+def build_transition(job):
+    key, video_dir, clip_out, clip_in, steps, mode = job
+    frames_out = load_clip(video_dir, clip_out)
+    frames_in = load_clip(video_dir, clip_in)
+    if len(frames_out) == 0 or len(frames_in) == 0:
+        return None
+    frames = _engine.transition(frames_out[-1], frames_in[0], steps=steps, mode=mode)
+    return key, np.asarray(frames)
+
+
+def precompute_transitions(video_dir, db_path, top=200, steps=10, mode="forward", workers=None):
+    """Precompute the most frequent transitions and merge them into transitions.npz."""
+    if not os.path.exists(video_dir):
+        print("Error: The specified folder does not exist.")
+        return
+    index = GlossIndex(video_dir)
+    counts = rank_pairs(db_path, index)
+    if not counts:
+        print("No clip pairs found in the log.")
+        return
+
+    out_path = os.path.join(video_dir, LIBRARY_FILE)
+    entries = {}
+    if os.path.exists(out_path):
+        with np.load(out_path) as existing:
+            # Transitions of re-recorded or removed clips are dropped and rebuilt
+            entries = {k: existing[k] for k in existing.files if is_current_key(k, index)}
+            stale = len(existing.files) - len(entries)
+        if stale:
+            print(f"Dropped {stale} stale transitions")
+
+    jobs = []
+    for (a, b), _ in counts.most_common(top):
+        key = library_key((a, b), steps, mode, index)
+        if key is not None and key not in entries:
+            jobs.append((key, video_dir, a, b, steps, mode))
+    print(f"{len(counts)} distinct pairs logged, computing {len(jobs)} transitions")
+
+    with Pool(processes=workers, initializer=init_worker, initargs=(video_dir,)) as pool:
+        for i, result in enumerate(pool.imap_unordered(build_transition, jobs), 1):
+            if result is None:
+                continue
+            key, frames = result
+            entries[key] = frames
+            print(f"[{i}/{len(jobs)}] {key}")
+
+    tmp_path = out_path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **entries)
+    os.replace(tmp_path, out_path)
+    print(f"Transition library written: {len(entries)} transitions -> {out_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute word-to-word transitions for the most frequent clip pairs.")
+    parser.add_argument("video_dir", nargs="?", default="ISL_VIDEOS")
+    parser.add_argument("--db", default="translation_log.db")
+    parser.add_argument("--top", type=int, default=200, help="number of most frequent pairs to precompute")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--mode", choices=["forward", "bidirectional", "crossfade"], default="forward")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    precompute_transitions(args.video_dir, args.db, args.top, args.steps, args.mode, args.workers)
@@ -0,0 +1,191 @@
+import os
+import shutil
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from metrics import span, trace, current_trace
+
+# ========== Config ==========
+RENDER_FPS = 30
+PAUSE_SECONDS = 0.5
+PREFETCH_WORKERS = 2
+PREFETCH_DEPTH = 4       # clips scheduled ahead of the playback cursor
+
+
+# ========== Prefetching ==========
+def _traced(stages, fn, *args):
+    """Run fn on a worker thread as part of the caller's trace, if it had one."""
+    if stages is None:
+        return fn(*args)
+    with trace(stages):
+        return fn(*args)
+
+
+def _transition_between(transition, previous, current):
+    clip_out, load_out = previous
+    clip_in, load_in = current
+    frames_out = load_out.result()
+    frames_in = load_in.result()
+    if len(frames_out) == 0 or len(frames_in) == 0:
+        return None
+    return transition(frames_out[-1], frames_in[0], (clip_out, clip_in))
+
+
+def prefetch_clips(clips, load_frames, transition=None,
+                   workers=PREFETCH_WORKERS, depth=PREFETCH_DEPTH, after=None):
+    """Yield (clip, transition_frames, frames) for each clip, loading ahead of the cursor.
+
+    Up to depth clips, and the transitions into them, are scheduled on a
+    thread pool while earlier clips are being consumed, so the gap between
+    signs does not depend on whether the next clip is cached. Pause markers
+    come through as (None, None, None). transition_frames is None without a
+    transition callable, and for the first clip unless after names the clip
+    played just before these. Decode and transition spans on the pool count
+    towards the consumer's trace().
+    """
+    clips = iter(clips)
+    stages = current_trace()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="isl-prefetch")
+    pending = deque()
+    previous = None if after is None else (after, pool.submit(_traced, stages, load_frames, after))
+
+    def schedule():
+        nonlocal previous
+        clip = next(clips, False)
+        if clip is False:
+            return False
+        if clip is None:
+            pending.append((None, None, None))
+            return True
+        load = pool.submit(_traced, stages, load_frames, clip)
+        trans = None
+        # Dependencies are always submitted first, so a FIFO pool cannot deadlock
+        if transition is not None and previous is not None:
+            trans = pool.submit(_traced, stages, _transition_between, transition, previous, (clip, load))
+        pending.append((clip, trans, load))
+        previous = (clip, load)
+        return True
+
+    try:
+        while len(pending) < depth and schedule():
+            pass
+        while pending:
+            clip, trans, load = pending.popleft()
+            schedule()
+            if clip is None:
+                yield None, None, None
+                continue
+            frames = load.result()
+            yield clip, (trans.result() if trans is not None else None), frames
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ========== Sentence Assembly ==========
+def assemble_sentence(clips, load_frames, transition=None, hold_frames=0,
+                      workers=PREFETCH_WORKERS):
+    """Yield every frame of a signed sentence in display order.
+
+    clips is a sequence of clip paths, with None marking a pause between
+    spelled words (the last frame is held for hold_frames). transition, if
+    given, is called as transition(last_frame, first_frame, pair) and its
+    frames are emitted before each clip after the first. Clips and
+    transitions are prefetched on a small thread pool.
+    """
+    last_frame = None
+    for clip, transition_frames, frames in prefetch_clips(clips, load_frames, transition, workers):
+        if clip is None:
+            if last_frame is not None:
+                for _ in range(hold_frames):
+                    yield last_frame
+            continue
+        if len(frames) == 0:
+            continue
+        if transition_frames is not None and last_frame is not None:
+            yield from transition_frames
+        yield from frames
+        last_frame = frames[-1]
+
+
+# ========== Encoding ==========
+def _even_size(frame):
+    # H.264 with yuv420p needs even dimensions
+    h, w = frame.shape[:2]
+    return w - w % 2, h - h % 2
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _encode_ffmpeg(frames, fps):
+    """Pipe raw RGB frames through ffmpeg and collect a fragmented MP4 from stdout."""
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return b""
+    w, h = _even_size(first)
+    command = [
+        "ffmpeg", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", f"{fps:.3f}", "-i", "-",
+        "-c:v", "libx264", "-preset", "veryfast", "-tune", "zerolatency", "-pix_fmt", "yuv420p",
+        "-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4", "-",
+    ]
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    chunks = []
+    # Drain stdout on a thread so a full pipe never blocks the writer
+    reader = threading.Thread(target=lambda: chunks.extend(iter(lambda: proc.stdout.read(65536), b"")))
+    reader.start()
+    try:
+        for frame in _chain(first, frames):
+            if frame.shape[1] != w or frame.shape[0] != h:
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_LINEAR)
+            proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+    finally:
+        proc.stdin.close()
+        reader.join()
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with status {proc.returncode}")
+    return b"".join(chunks)
+
+
+def _encode_opencv(frames, fps):
+    """Encode with cv2.VideoWriter as WebM/VP8 through a temporary file."""
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return b""
+    w, h = _even_size(first)
+    fd, path = tempfile.mkstemp(suffix=".webm")
+    os.close(fd)
+    try:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"VP80"), fps, (w, h))
+        if not writer.isOpened():
+            raise RuntimeError("OpenCV has no VP8 encoder available")
+        for frame in _chain(first, frames):
+            if frame.shape[1] != w or frame.shape[0] != h:
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_LINEAR)
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        writer.release()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+@span("render")
+def encode_frames(frames, fps=RENDER_FPS):
+    """Encode RGB frames into one browser-playable video.
+
+    Returns (data, mime_type): H.264 MP4 via ffmpeg when it is on PATH,
+    otherwise VP8 WebM via OpenCV.
+    """
+    if shutil.which("ffmpeg"):
+        return _encode_ffmpeg(frames, fps), "video/mp4"
+    return _encode_opencv(frames, fps), "video/webm"
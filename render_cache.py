@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from metrics import span
+from trim import TRIM_IDLE
+
+# ========== Config ==========
+CACHE_DIR = os.environ.get("ISL_RENDER_CACHE_DIR", ".render_cache")
+DEFAULT_BUDGET_MB = float(os.environ.get("ISL_RENDER_CACHE_MB", "1024"))
+EXTENSIONS = {"video/mp4": ".mp4", "video/webm": ".webm"}
+CACHE_VERSION = 2
+
+
+def _stat_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def make_key(clips, speed_factor, morph, mtime_of=_stat_mtime):
+    """Content address for a rendered sentence.
+
+    Built from the resolved clip sequence (with each clip's mtime, so a
+    re-recorded clip invalidates its sentences), the speed factor and the
+    transition setting, and whether idle frames are trimmed. Pause markers
+    (None) are part of the sequence.
+    mtime_of lets callers read mtimes from the clip manifest instead of stat.
+    """
+    sequence = []
+    for clip in clips:
+        if clip is None:
+            sequence.append(None)
+            continue
+        mtime = mtime_of(clip)
+        sequence.append([os.path.basename(clip), mtime])
+    payload = json.dumps([CACHE_VERSION, sequence, round(speed_factor, 3), morph, TRIM_IDLE])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Disk cache of encoded sentence videos with size-based LRU eviction.
+
+    Files live under cache_dir/<2-char prefix>/<key><ext>; a hit refreshes the
+    file's mtime, and the oldest files are removed once the total exceeds the
+    budget.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, budget_bytes=None):
+        if budget_bytes is None:
+            budget_bytes = int(DEFAULT_BUDGET_MB * 1024 * 1024)
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._scan())
+        self.hits = 0
+        self.misses = 0
+
+    def _scan(self):
+        """Yield (path, mtime, size) for every cached file."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_mtime, st.st_size
+
+    def _path(self, key, mime):
+        return os.path.join(self.cache_dir, key[:2], key + EXTENSIONS[mime])
+
+    @span("render_cache")
+    def get(self, key):
+        """Return (data, mime) for a cached render, or None."""
+        for mime in EXTENSIONS:
+            path = self._path(key, mime)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return data, mime
+        self.misses += 1
+        return None
+
+    def put(self, key, data, mime):
+        path = self._path(key, mime)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            # An overwrite replaces the old file's bytes rather than adding to them
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            self.total_bytes += len(data) - old_size
+            if self.total_bytes > self.budget_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._scan(), key=lambda e: e[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self.total_bytes <= self.budget_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total_bytes -= size
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Return the shared render cache for this process, creating it on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = RenderCache()
+        return _default_cache
+
+
+def benchmark(iterations=200, size_kb=500):
+    """Time the hit path (key + file read) for a render of the given size."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RenderCache(tmp)
+        clips = [f"ISL_VIDEOS/{c}.mov" for c in "HELLOHOWAREYOU"] + [None]
+        data = os.urandom(size_kb * 1024)
+        cache.put(make_key(clips, 1.0, "forward"), data, "video/mp4")
+        start = time.perf_counter()
+        for _ in range(iterations):
+            assert cache.get(make_key(clips, 1.0, "forward")) is not None
+        elapsed = (time.perf_counter() - start) / iterations
+    print(f"Render cache hit: {elapsed * 1000:.3f} ms per lookup ({size_kb} KB video, {iterations} runs)")
+    return elapsed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench":
+        benchmark()
+    else:
+        cache = RenderCache()
+        print(f"{cache.cache_dir}: {cache.total_bytes / 1e6:.1f} MB of {cache.budget_bytes / 1e6:.0f} MB")
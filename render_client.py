@@ -0,0 +1,67 @@
+import os
+import json
+import urllib.error
+import urllib.request
+
+# ========== Config ==========
+RENDER_SERVICE_URL = os.environ.get("ISL_RENDER_SERVICE_URL")   # e.g. http://127.0.0.1:8700
+REQUEST_TIMEOUT = 60
+
+
+class ServiceUnavailable(Exception):
+    """The render service could not be reached or refused the job (503)."""
+
+
+class RequestRejected(ValueError):
+    """The render service answered 4xx: it cannot serve this request, but may serve others."""
+
+
+class RenderClient:
+    """Talks to render_service.py over HTTP, so UIs do no decoding or encoding themselves."""
+
+    def __init__(self, base_url=RENDER_SERVICE_URL, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path, body, content_type):
+        request = urllib.request.Request(self.base_url + path, data=body, method="POST",
+                                         headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read(), response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 503:
+                raise ServiceUnavailable(f"Render service busy (retry after {e.headers.get('Retry-After')}s)")
+            detail = e.read().decode("utf-8", "replace")
+            raise RequestRejected(f"Render service rejected request: {detail}")
+        except (urllib.error.URLError, OSError) as e:
+            raise ServiceUnavailable(f"Render service unreachable: {e}")
+
+    def render(self, clips, speed_factor=1.0, mode="forward"):
+        """Encode a sentence given as clip paths (None for pauses); returns (data, mime)."""
+        payload = {
+            "clips": [os.path.basename(c) if c else None for c in clips],
+            "speed_factor": speed_factor,
+            "mode": mode,
+        }
+        data, headers = self._post("/render", json.dumps(payload).encode("utf-8"), "application/json")
+        return data, headers.get("Content-Type", "video/mp4")
+
+    def render_text(self, text, speed_factor=1.0, mode="forward"):
+        """Resolve and encode text on the service; returns (data, mime, missing_letters)."""
+        payload = {"text": text, "speed_factor": speed_factor, "mode": mode}
+        data, headers = self._post("/render", json.dumps(payload).encode("utf-8"), "application/json")
+        return data, headers.get("Content-Type", "video/mp4"), list(headers.get("X-Missing-Letters", ""))
+
+    def recognize(self, wav_bytes, language, backend=None):
+        """Recognize and translate WAV audio; returns the service's JSON result."""
+        query = f"?language={urllib.request.quote(language)}"
+        if backend:
+            query += f"&backend={urllib.request.quote(backend)}"
+        data, _ = self._post("/recognize" + query, wav_bytes, "audio/wav")
+        return json.loads(data)
+
+
+def get_render_client():
+    """Client for ISL_RENDER_SERVICE_URL, or None when no service is configured."""
+    return RenderClient(RENDER_SERVICE_URL) if RENDER_SERVICE_URL else None
@@ -0,0 +1,298 @@
+import io
+import os
+import asyncio
+import argparse
+from collections import deque
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import speech_recognition as sr
+
+from pipeline import SignPipeline, VIDEO_DIR, TRANSITION_MODES
+from render import RENDER_FPS, PAUSE_SECONDS
+from render_cache import make_key
+from metrics import get_metrics, span
+
+# ========== Config ==========
+WORKERS = int(os.environ.get("ISL_SERVICE_WORKERS", os.cpu_count() or 1))
+MAX_PENDING_PER_WORKER = 4     # jobs queued per worker before new requests get 503
+STREAM_LOOKAHEAD = 4           # clips rendered ahead of the one being sent on /stream
+JPEG_QUALITY = 80
+
+# Set per worker process by init_worker
+_pipeline = None
+
+
+# ========== Worker Jobs ==========
+def init_worker(video_dir):
+    global _pipeline
+    _pipeline = SignPipeline(video_dir)
+
+
+def render_job(clips, speed_factor, mode):
+    return _pipeline.render(clips, speed_factor, mode)
+
+
+def _jpeg(frames):
+    params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    return [cv2.imencode(".jpg", cv2.cvtColor(f, cv2.COLOR_RGB2BGR), params)[1].tobytes() for f in frames]
+
+
+def clip_job(clip, previous, mode):
+    """JPEG frames of the transition from previous (if any) into clip, then of clip itself."""
+    frames = _pipeline.load(clip)
+    transition = []
+    if previous is not None and len(frames):
+        previous_frames = _pipeline.load(previous)
+        if len(previous_frames):
+            transition = _pipeline.transition(previous_frames[-1], frames[0], pair=(previous, clip), mode=mode)
+    return _jpeg(transition), _jpeg(frames)
+
+
+# ========== Service ==========
+class ServiceBusy(Exception):
+    pass
+
+
+class RenderService:
+    """Runs decode, morph and encode jobs on a process pool with bounded admission.
+
+    Text resolution and render-cache hits are answered in the server process;
+    everything CPU-bound goes to one of `workers` processes. At most
+    max_pending jobs may be outstanding; beyond that requests are refused with
+    ServiceBusy instead of queueing without limit. Queue depth, in-flight jobs
+    and rejections are published as metrics.
+    """
+
+    def __init__(self, video_dir=VIDEO_DIR, workers=WORKERS, max_pending=None):
+        self.video_dir = video_dir
+        self.workers = workers
+        self.max_pending = max_pending or workers * MAX_PENDING_PER_WORKER
+        self.pending = 0
+        self.pipeline = SignPipeline(video_dir)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(video_dir,))
+        self._publish()
+
+    def _publish(self):
+        metrics = get_metrics()
+        metrics.set_gauge("render_workers", self.workers)
+        metrics.set_gauge("render_inflight", min(self.pending, self.workers))
+        metrics.set_gauge("render_queue_depth", max(0, self.pending - self.workers))
+
+    async def submit(self, fn, *args):
+        """Run fn(*args) in the pool; raises ServiceBusy when the queue is full."""
+        if self.pending >= self.max_pending:
+            get_metrics().increment("render_rejected")
+            raise ServiceBusy()
+        self.pending += 1
+        self._publish()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.pending -= 1
+            self._publish()
+
+    def resolve(self, payload):
+        """Clip paths and missing letters for a request with either "text" or "clips" (file names)."""
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        # Pick up clips added since the service started
+        self.pipeline.index.refresh()
+        if "clips" in payload:
+            if not isinstance(payload["clips"], list):
+                raise ValueError("'clips' must be a list of file names")
+            known = self.pipeline.index.files
+            clips = []
+            for name in payload["clips"]:
+                if name is None:
+                    clips.append(None)
+                    continue
+                path = os.path.join(self.video_dir, os.path.basename(str(name)))
+                if path not in known:
+                    raise ValueError(f"Unknown clip: {name}")
+                clips.append(path)
+            return clips, []
+        text = payload.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("Request needs 'text' or 'clips'")
+        return self.pipeline.resolve(text)
+
+    async def render(self, clips, speed_factor, mode):
+        """(data, mime, cached) for a sentence; cache hits never touch the pool."""
+        # Clip versions come from the manifest, which may rescan the folder; keep that off the event loop
+        key = await asyncio.to_thread(make_key, clips, speed_factor, mode, mtime_of=self.pipeline.index.mtime)
+        cached = await asyncio.to_thread(self.pipeline.render_cache.get, key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        data, mime = await self.submit(render_job, clips, speed_factor, mode)
+        return data, mime, False
+
+    def recognize(self, wav_bytes, language, backend):
+        """Recognize a WAV upload and translate it; runs on a thread (network-bound)."""
+        with sr.AudioFile(io.BytesIO(wav_bytes)) as source:
+            audio = sr.Recognizer().record(source)
+        text = self.pipeline.recognize(audio, language, backend)
+        english, from_dictionary = self.pipeline.translate(text, language)
+        return {"text": text, "english": english, "from_dictionary": from_dictionary}
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _options(payload):
+    try:
+        speed_factor = float(payload.get("speed_factor", 1.0))
+    except (TypeError, ValueError):
+        raise ValueError("speed_factor must be a number")
+    mode = payload.get("mode", "forward")
+    if mode not in TRANSITION_MODES:
+        raise ValueError(f"mode must be one of {', '.join(TRANSITION_MODES)}")
+    if not 0.1 <= speed_factor <= 10:
+        raise ValueError("speed_factor must be between 0.1 and 10")
+    return speed_factor, mode
+
+
+# ========== HTTP / WebSocket API ==========
+def create_app(video_dir=VIDEO_DIR, workers=WORKERS, max_pending=None):
+    """Build the ASGI app. Endpoints:
+
+    POST /render      JSON {"text" | "clips", "speed_factor", "mode"} -> encoded video
+    WS   /stream      same JSON as first message -> {"fps", "clips", "missing"},
+                      then JPEG frames as binary messages, {"pause": s} between
+                      spelled words, and {"done": true} at the end
+    POST /recognize   WAV body, ?language=hi-IN&backend=vosk -> recognized + English text
+    GET  /metrics     Prometheus text, including queue depth and rejections
+    GET  /health      worker and queue status
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse, Response
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocketDisconnect
+
+    service = RenderService(video_dir, workers, max_pending)
+
+    def busy():
+        return JSONResponse({"error": "busy"}, status_code=503, headers={"Retry-After": "1"})
+
+    async def render(request):
+        get_metrics().increment("render_requests")
+        try:
+            payload = await request.json()
+            clips, missing = await asyncio.to_thread(service.resolve, payload)
+            speed_factor, mode = _options(payload)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        try:
+            with span("service_render"):
+                data, mime, cached = await service.render(clips, speed_factor, mode)
+        except ServiceBusy:
+            return busy()
+        headers = {"X-Missing-Letters": "".join(missing), "X-Render-Cache": "hit" if cached else "miss"}
+        return Response(data, media_type=mime, headers=headers)
+
+    async def stream(websocket):
+        await websocket.accept()
+        pending = deque()
+        try:
+            try:
+                payload = await websocket.receive_json()
+            except (ValueError, KeyError):
+                # Malformed JSON or a binary frame; resolve() rejects the missing payload below
+                payload = None
+            try:
+                clips, missing = await asyncio.to_thread(service.resolve, payload)
+                speed_factor, mode = _options(payload)
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                await websocket.close(code=1008)
+                return
+            await websocket.send_json({
+                "fps": RENDER_FPS * speed_factor,
+                "clips": [os.path.basename(c) if c else None for c in clips],
+                "missing": missing,
+            })
+            upcoming = iter(clips)
+            previous = None
+
+            def schedule():
+                nonlocal previous
+                clip = next(upcoming, False)
+                if clip is False:
+                    return False
+                if clip is None:
+                    pending.append(None)
+                else:
+                    pending.append(asyncio.ensure_future(service.submit(clip_job, clip, previous, mode)))
+                    previous = clip
+                return True
+
+            while len(pending) < STREAM_LOOKAHEAD and schedule():
+                pass
+            while pending:
+                job = pending.popleft()
+                schedule()
+                if job is None:
+                    await websocket.send_json({"pause": PAUSE_SECONDS})
+                    continue
+                transition, frames = await job
+                for jpeg in transition + frames:
+                    # Awaiting each send applies the client's pace back to the lookahead window
+                    await websocket.send_bytes(jpeg)
+            await websocket.send_json({"done": True})
+            await websocket.close()
+        except ServiceBusy:
+            await websocket.send_json({"error": "busy"})
+            await websocket.close(code=1013)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for job in pending:
+                if job is not None:
+                    job.cancel()
+
+    async def recognize(request):
+        language = request.query_params.get("language", "en-IN")
+        backend = request.query_params.get("backend")
+        body = await request.body()
+        try:
+            result = await asyncio.to_thread(service.recognize, body, language, backend)
+        except sr.UnknownValueError:
+            return JSONResponse({"error": "Could not understand audio"}, status_code=422)
+        except (sr.RequestError, ValueError) as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return JSONResponse(result)
+
+    async def metrics(request):
+        return PlainTextResponse(get_metrics().prometheus_text())
+
+    async def health(request):
+        return JSONResponse({"workers": service.workers, "pending": service.pending,
+                             "max_pending": service.max_pending})
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        service.close()
+
+    routes = [
+        Route("/render", render, methods=["POST"]),
+        WebSocketRoute("/stream", stream),
+        Route("/recognize", recognize, methods=["POST"]),
+        Route("/metrics", metrics),
+        Route("/health", health),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve ISL rendering over HTTP and WebSocket.")
+    parser.add_argument("video_dir", nargs="?", default=VIDEO_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="render processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help=f"outstanding jobs before requests get 503 (default: {MAX_PENDING_PER_WORKER} per worker)")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.video_dir, args.workers, args.max_pending), host=args.host, port=args.port)
@@ -0,0 +1,264 @@
+import os
+import time
+import argparse
+import threading
+from multiprocessing import Pool
+import numpy as np
+
+from frame_store import open_frame_store, decode_active_frames, video_fps
+from gloss_index import get_gloss_index
+from metrics import span
+
+# ========== Config ==========
+VIDEO_DIR = "ISL_VIDEOS"
+INDEX_FILE = "signs.npz"
+INDEX_VERSION = 1
+SEQUENCE_LENGTH = 32     # every clip is resampled to this many keypoint frames
+EXTRACT_FPS = 15         # frames per second fed to the keypoint model
+CANDIDATES = 32          # nearest neighbours re-ranked with DTW
+DTW_BAND = 4             # Sakoe-Chiba window, in resampled frames
+
+# MediaPipe pose landmarks kept: nose, shoulders, elbows, wrists
+POSE_POINTS = (0, 11, 12, 13, 14, 15, 16)
+HAND_POINTS = 21
+FEATURES = (len(POSE_POINTS) + 2 * HAND_POINTS) * 2
+
+
+# ========== Keypoints ==========
+class KeypointExtractor:
+    """Per-frame upper-body and hand keypoints from MediaPipe Holistic.
+
+    Each frame becomes FEATURES floats: (x, y) of POSE_POINTS and of both
+    hands, relative to the midpoint of the shoulders and divided by the
+    shoulder width, so signers at different distances and positions in the
+    frame compare equally. Parts that are not detected are zero. Holistic
+    tracks landmarks from frame to frame, so each video gets a fresh
+    extractor; reusing one would carry the previous video's pose into the
+    first frames of the next.
+    """
+
+    def __init__(self):
+        import mediapipe as mp
+        self._holistic = mp.solutions.holistic.Holistic(static_image_mode=False, model_complexity=1)
+
+    def close(self):
+        self._holistic.close()
+
+    @staticmethod
+    def _points(landmarks, count, indices=None):
+        if landmarks is None:
+            return np.full((count, 2), np.nan, dtype=np.float32)
+        points = landmarks.landmark
+        if indices is not None:
+            points = [points[i] for i in indices]
+        return np.array([(p.x, p.y) for p in points], dtype=np.float32)
+
+    def frame(self, rgb):
+        results = self._holistic.process(rgb)
+        pose = self._points(results.pose_landmarks, len(POSE_POINTS), POSE_POINTS)
+        left = self._points(results.left_hand_landmarks, HAND_POINTS)
+        right = self._points(results.right_hand_landmarks, HAND_POINTS)
+        points = np.concatenate([pose, left, right])
+        shoulders = pose[1:3]
+        if not np.isnan(shoulders).any():
+            center = shoulders.mean(axis=0)
+            scale = max(float(np.linalg.norm(shoulders[0] - shoulders[1])), 1e-3)
+            points = (points - center) / scale
+        return np.nan_to_num(points, nan=0.0).ravel()
+
+    @span("keypoints")
+    def sequence(self, frames, fps=30.0):
+        """(T, FEATURES) keypoints for RGB frames, sampled at about EXTRACT_FPS."""
+        step = max(1, int(round(fps / EXTRACT_FPS)))
+        sampled = frames[::step] if len(frames) else frames
+        if len(sampled) == 0:
+            return np.zeros((0, FEATURES), dtype=np.float32)
+        return np.stack([self.frame(np.ascontiguousarray(f)) for f in sampled])
+
+
+def video_keypoints(frames, fps):
+    """(T, FEATURES) keypoints for one video, tracked from a clean state."""
+    extractor = KeypointExtractor()
+    try:
+        return extractor.sequence(frames, fps)
+    finally:
+        extractor.close()
+
+
+def resample(sequence, length=SEQUENCE_LENGTH):
+    """Linearly resample a (T, D) sequence to (length, D)."""
+    sequence = np.asarray(sequence, dtype=np.float32)
+    if len(sequence) == 0:
+        return np.zeros((length, FEATURES), dtype=np.float32)
+    if len(sequence) == 1:
+        return np.repeat(sequence, length, axis=0)
+    position = np.linspace(0, len(sequence) - 1, length, dtype=np.float32)
+    lo = np.floor(position).astype(int)
+    hi = np.minimum(lo + 1, len(sequence) - 1)
+    w = (position - lo)[:, None]
+    return sequence[lo] * (1 - w) + sequence[hi] * w
+
+
+# ========== Matching ==========
+def dtw_distances(candidates, query, band=DTW_BAND):
+    """Banded DTW distance from query (L, D) to each of candidates (K, L, D), all K at once.
+
+    Frame costs come from one batched matrix product; the recursion then runs
+    over the (L, 2*band+1) window with every step vectorized across the K
+    candidates. Distances are normalized by path length.
+    """
+    k, length, _ = candidates.shape
+    sq = (candidates ** 2).sum(-1)[:, :, None] + (query ** 2).sum(-1)[None, None, :]
+    cost = np.sqrt(np.maximum(sq - 2 * candidates @ query.T, 0))
+    acc = np.full((k, length + 1, length + 1), np.inf, dtype=np.float32)
+    acc[:, 0, 0] = 0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - band), min(length, i + band) + 1):
+            best = np.minimum(np.minimum(acc[:, i - 1, j], acc[:, i, j - 1]), acc[:, i - 1, j - 1])
+            acc[:, i, j] = cost[:, i - 1, j - 1] + best
+    return acc[:, length, length] / (2 * length)
+
+
+class SignIndex:
+    """Resampled keypoint sequences of every library clip, searchable by example.
+
+    Stored as one float16 array of shape (clips, SEQUENCE_LENGTH, FEATURES).
+    match() finds the nearest CANDIDATES clips by Euclidean distance over the
+    whole flattened sequence (one matrix-vector product), then re-ranks them
+    with banded DTW to tolerate differences in timing.
+    """
+
+    def __init__(self, labels, names, mtimes, sequences):
+        self.labels = list(labels)
+        self.names = list(names)
+        self.mtimes = np.asarray(mtimes, dtype=np.float64)
+        self.sequences = np.asarray(sequences, dtype=np.float32)
+        self._flat = self.sequences.reshape(len(self.labels), -1)
+        self._norms = (self._flat ** 2).sum(axis=1)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                raise ValueError(f"{path} was built by another version; rebuild it with sign_index.py")
+            return cls(data["labels"].tolist(), data["names"].tolist(), data["mtimes"], data["sequences"])
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, version=INDEX_VERSION, labels=np.array(self.labels), names=np.array(self.names),
+                 mtimes=self.mtimes, sequences=self.sequences.astype(np.float16))
+        os.replace(tmp, path)
+
+    @span("sign_match")
+    def match(self, sequence, top_k=5, candidates=CANDIDATES, band=DTW_BAND):
+        """Best (label, distance) matches for a (T, FEATURES) keypoint sequence, closest first."""
+        if not self.labels:
+            return []
+        query = resample(sequence)
+        flat = query.ravel()
+        distances = self._norms - 2 * (self._flat @ flat) + flat @ flat
+        k = min(candidates, len(self.labels))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        scores = dtw_distances(self.sequences[nearest], query, band)
+        order = np.argsort(scores)[:top_k]
+        return [(self.labels[nearest[i]], float(scores[i])) for i in order]
+
+
+# ========== Building ==========
+_store = None
+
+
+def init_worker(video_dir):
+    global _store
+    _store = open_frame_store(video_dir)
+
+
+def extract_clip(path):
+    frames = _store.get(path) if _store is not None else None
+    fps = _store.fps(path) if frames is not None else video_fps(path)
+    if frames is None:
+        frames = decode_active_frames(path)
+    return resample(video_keypoints(frames, fps))
+
+
+def build_sign_index(video_dir=VIDEO_DIR, workers=None):
+    """Extract keypoints for every clip into video_dir/signs.npz.
+
+    Clips whose mtime matches the existing index are reused, so adding a few
+    signs only processes the new files. Returns the index.
+    """
+    path = os.path.join(video_dir, INDEX_FILE)
+    glosses = get_gloss_index(video_dir)
+    previous = {}
+    if os.path.exists(path):
+        try:
+            old = SignIndex.load(path)
+            previous = {name: (mtime, seq) for name, mtime, seq in zip(old.names, old.mtimes, old.sequences)}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding unreadable sign index: {e}")
+
+    entries = []
+    todo = []
+    for label in glosses.labels():
+        clip = glosses.get(label)
+        name = os.path.basename(clip)
+        mtime = os.path.getmtime(clip)
+        cached = previous.get(name)
+        if cached is not None and cached[0] == mtime:
+            entries.append((label, name, mtime, cached[1]))
+        else:
+            todo.append((label, name, mtime, clip))
+
+    start = time.perf_counter()
+    if todo:
+        # Fail here rather than in every pool worker, which would be restarted forever
+        import mediapipe  # noqa: F401
+        with Pool(workers, initializer=init_worker, initargs=(video_dir,)) as pool:
+            for i, sequence in enumerate(pool.imap(extract_clip, [job[3] for job in todo]), 1):
+                label, name, mtime, _ = todo[i - 1]
+                entries.append((label, name, mtime, sequence))
+                print(f"[{i}/{len(todo)}] {label}")
+    entries.sort()
+    sequences = (np.stack([e[3] for e in entries]) if entries
+                 else np.zeros((0, SEQUENCE_LENGTH, FEATURES), dtype=np.float32))
+    index = SignIndex([e[0] for e in entries], [e[1] for e in entries], [e[2] for e in entries], sequences)
+    index.save(path)
+    size_kb = os.path.getsize(path) / 1024
+    print(f"Indexed {len(index)} signs ({len(todo)} extracted, {len(index) - len(todo)} reused) "
+          f"in {time.perf_counter() - start:.1f}s -> {path} ({size_kb:.0f} KB)")
+    return index
+
+
+def recognize_video(path, index, top_k=5):
+    """Best (label, distance) matches in index for the signing in a video file."""
+    sequence = video_keypoints(decode_active_frames(path), video_fps(path))
+    return index.match(sequence, top_k=top_k)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_sign_index(video_dir=VIDEO_DIR):
+    """Shared index for video_dir, reloaded when signs.npz changes; None if it was never built."""
+    path = os.path.join(video_dir, INDEX_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _indexes_lock:
+        cached = _indexes.get(video_dir)
+        if cached is None or cached[0] != mtime:
+            cached = _indexes[video_dir] = (mtime, SignIndex.load(path))
+        return cached[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract hand and pose keypoints of every clip for sign recognition.")
+    parser.add_argument("video_dir", nargs="?", default=VIDEO_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    args = parser.parse_args()
+    build_sign_index(args.video_dir, args.workers)
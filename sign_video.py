@@ -2,8 +2,11 @@ import streamlit as st
 import os
 import cv2
 import time
-from gtts import gTTS
 import tempfile
+from gloss_index import get_gloss_index
+from sign_index import get_sign_index, recognize_video
+from metrics import trace, session_profiler
+from tts import synthesize, available_engines, label_text
 
 # Configuration
 VIDEO_INPUT_DIR = "ISL_VIDEOS"
@@ -11,6 +14,10 @@ VIDEO_INPUT_DIR = "ISL_VIDEOS"
 st.set_page_config(page_title="Sign Video to Speech", layout="centered")
 st.title("🎬 Sign Video to Speech Translator")
 
+engines = available_engines()
+tts_engine = st.sidebar.selectbox("Voice Engine", engines,
+                                  help="espeak and pyttsx3 run offline on this machine") if engines else None
+
 # Helper: Play video
 def play_video(path, frame_area):
     cap = cv2.VideoCapture(path)
@@ -22,27 +29,70 @@ def play_video(path, frame_area):
         time.sleep(0.03)
     cap.release()
 
-# Helper: Speak text using gTTS
+# Helper: Speak text from the TTS cache (generated on first use, or ahead of time with tts.py)
 def speak_text(text):
-    tts = gTTS(text=text, lang='en')
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-        tts.save(fp.name)
-        st.audio(fp.name, format='audio/mp3')
-
-# Load available sign videos
-video_files = [f for f in os.listdir(VIDEO_INPUT_DIR) if f.endswith((".mp4", ".mov"))]
-video_labels = [os.path.splitext(f)[0].upper() for f in video_files]
-
-# Sidebar - Select video
-selected_label = st.selectbox("📁 Select a Sign Video", video_labels)
-selected_video = os.path.join(VIDEO_INPUT_DIR, selected_label + ".mov")
-
-if st.button("▶️ Play and Speak"):
-    st.subheader(f"🔤 Detected Sign: {selected_label}")
-    frame_area = st.empty()
-    play_video(selected_video, frame_area)
-
-    # Convert filename to spoken word
-    text_to_speak = selected_label.replace("_", " ")
-    st.success(f"🗣 Speaking: {text_to_speak}")
-    speak_text(text_to_speak)
+    try:
+        data, mime = synthesize(text, engine=tts_engine)
+    except Exception as e:
+        st.error(f"Could not generate speech: {e}")
+        return
+    st.audio(data, format=mime)
+
+# Helper: Recognize the sign in an uploaded clip against the keypoint index
+def recognize_upload(upload):
+    sign_index = get_sign_index(VIDEO_INPUT_DIR)
+    if sign_index is None:
+        st.info("No sign index yet. Build it once with: python sign_index.py ISL_VIDEOS")
+        return None
+    suffix = os.path.splitext(upload.name)[1] or ".mp4"
+    # OpenCV decodes from a path; the directory is removed with the file in it
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "upload" + suffix)
+        with open(path, "wb") as f:
+            f.write(upload.getbuffer())
+        try:
+            with trace() as stages:
+                matches = recognize_video(path, sign_index)
+        except ImportError:
+            st.error("Sign recognition needs MediaPipe: pip install mediapipe")
+            return None
+    if not matches:
+        st.warning("No signs matched.")
+        return None
+    st.dataframe([{"sign": label_text(label), "distance": round(d, 3)} for label, d in matches],
+                 use_container_width=True, hide_index=True)
+    st.caption(f"Keypoints {stages.get('keypoints', 0):.0f} ms, "
+               f"matching {stages.get('sign_match', 0):.0f} ms over {len(sign_index)} signs")
+    return matches[0][0]
+
+with session_profiler(st.session_state):
+    mode = st.radio("Input", ["Library clip", "Recognize my video"], horizontal=True)
+
+    if mode == "Recognize my video":
+        upload = st.file_uploader("Upload a sign clip (e.g. a webcam recording)", type=["mp4", "mov", "webm", "avi"])
+        if upload is not None and st.button("🔍 Recognize and Speak"):
+            label = recognize_upload(upload)
+            if label is not None:
+                st.subheader(f"🔤 Detected Sign: {label}")
+                text_to_speak = label_text(label)
+                st.success(f"🗣 Speaking: {text_to_speak}")
+                speak_text(text_to_speak)
+        st.stop()
+
+    # Load available sign videos from the shared clip manifest
+    video_index = get_gloss_index(VIDEO_INPUT_DIR)
+    video_labels = video_index.labels()
+
+    # Sidebar - Select video
+    selected_label = st.selectbox("📁 Select a Sign Video", video_labels)
+    selected_video = video_index.get(selected_label)
+
+    if st.button("▶️ Play and Speak"):
+        st.subheader(f"🔤 Detected Sign: {selected_label}")
+        frame_area = st.empty()
+        play_video(selected_video, frame_area)
+
+        # Convert filename to spoken word
+        text_to_speak = label_text(selected_label)
+        st.success(f"🗣 Speaking: {text_to_speak}")
+        speak_text(text_to_speak)
@@ -0,0 +1,270 @@
+import os
+import json
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+import speech_recognition as sr
+from audio_capture import get_audio_capture
+from metrics import span
+
+# ========== Config ==========
+DEFAULT_BACKEND = os.environ.get("ISL_ASR_BACKEND", "google")
+STREAM_SAMPLE_RATE = 16000
+STABLE_AFTER = 2          # partials a word must survive unchanged before it is signed
+VOSK_MODEL_DIR = os.environ.get("ISL_VOSK_MODEL_DIR", "models")
+# Offline model directory per language (first part of the language code)
+VOSK_MODELS = {
+    "en": "vosk-model-small-en-in-0.4",
+    "hi": "vosk-model-small-hi-0.22",
+    "te": "vosk-model-small-te-0.42",
+    "gu": "vosk-model-small-gu-0.42",
+}
+
+
+# ========== Backends ==========
+class SpeechBackend(ABC):
+    """Interface every speech recognizer implements.
+
+    recognize() turns one finished utterance (sr.AudioData) into text.
+    start_stream() returns a session that is fed raw PCM chunks; backends
+    with streaming=True return partial hypotheses from accept(), the rest
+    only produce text from finish().
+    """
+
+    name = "base"
+    streaming = False
+
+    @abstractmethod
+    def recognize(self, audio, language):
+        """Text of one finished utterance."""
+
+    def start_stream(self, language, sample_rate, sample_width):
+        return BufferedSession(self, language, sample_rate, sample_width)
+
+
+class BufferedSession:
+    """Stream session for backends without partial results: buffers, then recognizes once."""
+
+    def __init__(self, backend, language, sample_rate, sample_width):
+        self.backend = backend
+        self.language = language
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self._chunks = []
+
+    def accept(self, chunk):
+        self._chunks.append(chunk)
+        return ""
+
+    def finish(self):
+        audio = sr.AudioData(b"".join(self._chunks), self.sample_rate, self.sample_width)
+        return self.backend.recognize(audio, self.language)
+
+
+class GoogleBackend(SpeechBackend):
+    """Google Web Speech API via SpeechRecognition (needs network)."""
+
+    name = "google"
+
+    def __init__(self):
+        self._recognizer = sr.Recognizer()
+
+    @span("recognize")
+    def recognize(self, audio, language):
+        return self._recognizer.recognize_google(audio, language=language).strip()
+
+
+class VoskSession:
+    """Streaming Vosk recognition; accept() returns the running hypothesis."""
+
+    def __init__(self, recognizer):
+        self._recognizer = recognizer
+        self._segments = []
+
+    def _text(self, partial=""):
+        return " ".join(t for t in self._segments + [partial] if t)
+
+    def accept(self, chunk):
+        if self._recognizer.AcceptWaveform(chunk):
+            self._segments.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return self._text()
+        return self._text(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+
+    def finish(self):
+        text = self._text(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskBackend(SpeechBackend):
+    """Offline, CPU-only recognition with Vosk.
+
+    Each language's model is loaded once per process and shared; every
+    recognition gets its own lightweight KaldiRecognizer, so concurrent
+    sessions never reload or contend for the model.
+    """
+
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_dir=VOSK_MODEL_DIR):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model_dir = model_dir
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, language):
+        """Return the loaded model for language, loading it on first use."""
+        key = language.split("-")[0].lower()
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if key not in VOSK_MODELS:
+                    raise sr.RequestError(f"No offline speech model configured for '{language}'")
+                path = os.path.join(self.model_dir, VOSK_MODELS[key])
+                if not os.path.isdir(path):
+                    raise sr.RequestError(f"Offline speech model not found at {path}")
+                model = self._models[key] = self._vosk.Model(path)
+            return model
+
+    def _recognizer(self, language, sample_rate):
+        return self._vosk.KaldiRecognizer(self.model(language), sample_rate)
+
+    @span("recognize")
+    def recognize(self, audio, language):
+        recognizer = self._recognizer(language, STREAM_SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=STREAM_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def start_stream(self, language, sample_rate, sample_width):
+        if sample_width != 2:
+            return BufferedSession(self, language, sample_rate, sample_width)
+        return VoskSession(self._recognizer(language, sample_rate))
+
+
+BACKENDS = {"google": GoogleBackend, "vosk": VoskBackend}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+    """Make a backend available to get_speech_backend under name."""
+    BACKENDS[name] = factory
+
+
+def available_backends():
+    """Names of the backends whose dependencies are installed."""
+    names = ["google"]
+    try:
+        import vosk  # noqa: F401
+        names.append("vosk")
+    except ImportError:
+        pass
+    return names + [n for n in BACKENDS if n not in ("google", "vosk")]
+
+
+def get_speech_backend(name=None):
+    """Return the process-wide instance of a backend, creating it on first use."""
+    name = name or DEFAULT_BACKEND
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is None:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown speech backend '{name}' (available: {', '.join(BACKENDS)})")
+            backend = _instances[name] = BACKENDS[name]()
+        return backend
+
+
+# ========== Streaming ==========
+class StableWordTracker:
+    """Commits words once they stop changing across consecutive partial hypotheses."""
+
+    def __init__(self, stable_after=STABLE_AFTER):
+        self.committed = []
+        self._history = deque(maxlen=stable_after)
+
+    def update(self, hypothesis):
+        """Feed a partial hypothesis; return the words that just became stable."""
+        words = hypothesis.upper().split()
+        if not words:
+            return []
+        self._history.append(words)
+        if len(self._history) < self._history.maxlen:
+            return []
+        prefix = []
+        for column in zip(*self._history):
+            if any(w != column[0] for w in column):
+                break
+            prefix.append(column[0])
+        if prefix[:len(self.committed)] != self.committed:
+            return []
+        new = prefix[len(self.committed):]
+        self.committed.extend(new)
+        return new
+
+    def finalize(self, text):
+        """Return the words of the final result that were not committed yet."""
+        words = text.upper().split()
+        # Words already signed cannot be taken back, so only append what follows them
+        return words[len(self.committed):]
+
+
+class StreamingListener:
+    """Feeds the next utterance to a backend on a background thread and emits stable words.
+
+    Audio comes from the shared capture service, which is already open and
+    calibrated. Use listen() as an iterator: it yields lists of newly stable
+    words while the user is still speaking, and raises sr.WaitTimeoutError or
+    the backend's error if recognition fails.
+    """
+
+    def __init__(self, backend, language="en-IN", timeout=10, phrase_time_limit=8):
+        self.backend = backend
+        self.language = language
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+
+    def listen(self):
+        thread = threading.Thread(target=self._run, name="isl-listener", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self._stop.set()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            self._recognize(get_audio_capture())
+        except BaseException as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(None)
+
+    def _recognize(self, capture):
+        tracker = StableWordTracker()
+        session = self.backend.start_stream(self.language, capture.sample_rate, capture.sample_width)
+        for chunk in capture.utterance_chunks(self.timeout, self.phrase_time_limit, self._stop):
+            words = tracker.update(session.accept(chunk))
+            if words:
+                self._queue.put(words)
+        words = tracker.finalize(session.finish())
+        if words:
+            self._queue.put(words)
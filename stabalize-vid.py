@@ -1,56 +1,76 @@
 import os
-import subprocess
-import sys
+import shutil
+import argparse
 
-def convert_and_stabilize_videos(folder_path):
+from ingest import IngestJob, IngestManifest, run_jobs, run_ffmpeg, ffmpeg_threads, list_videos, DEFAULT_WORKERS
+
+# Smooth morph effect, 0.5 seconds before and after
+ENHANCED_TRANSITION = "xfade=transition=smoothleft:duration=0.5:offset=4.5"
+
+
+def stabilize_job(input_path, stabilized_path, preset, threads):
+    def build(inputs, output, workdir):
+        # vidstab passes exchange transforms.trf through the working directory,
+        # so each job gets its own to run safely alongside the others
+        run_ffmpeg(['-i', inputs[0], '-vf', 'vidstabdetect=shakiness=5:accuracy=10',
+                    '-threads', str(threads), '-f', 'null', '-'], cwd=workdir)
+        run_ffmpeg(['-i', inputs[0], '-vf', 'vidstabtransform=smoothing=30',
+                    '-c:v', 'libx264', '-preset', preset, '-crf', '18', '-threads', str(threads), output],
+                   cwd=workdir)
+    return IngestJob([input_path], stabilized_path, f"vidstab:5:10:30|x264:{preset}:18", build)
+
+
+def transition_job(input1, input2, output_transition, threads):
+    def build(inputs, output, workdir):
+        run_ffmpeg(['-i', inputs[0], '-i', inputs[1], '-filter_complex', ENHANCED_TRANSITION,
+                    '-threads', str(threads), output])
+    return IngestJob([input1, input2], output_transition, f"xfade|{ENHANCED_TRANSITION}", build)
+
+
+def convert_and_stabilize_videos(folder_path, workers=DEFAULT_WORKERS, preset='slow', transitions=True):
     if not os.path.exists(folder_path):
         print("Error: The specified folder does not exist.")
         return
-    
-    files = [f for f in os.listdir(folder_path) if f.endswith('.mp4')]
-    
+    if not shutil.which("ffmpeg"):
+        print("Error: ffmpeg was not found on PATH.")
+        return
+
+    files = list_videos(folder_path, '.mp4', exclude_prefixes=('stabilized_', 'transition_'))
+
     if not files:
         print("No MP4 files found in the folder.")
         return
-    
-    stabilized_files = []
-    
-    for file in files:
-        input_path = os.path.join(folder_path, file)
-        stabilized_path = os.path.join(folder_path, "stabilized_" + file)
-        output_path = os.path.join(folder_path, os.path.splitext(file)[0] + '.mov')
-
-        # Step 1: Stabilize the video to keep the character centered
-        stabilize_command = [
-            'ffmpeg', '-i', input_path, '-vf', 'vidstabdetect=shakiness=5:accuracy=10',
-            '-f', 'null', '-'
-        ]
-        subprocess.run(stabilize_command, check=True)
 
-        stabilize_command_apply = [
-            'ffmpeg', '-i', input_path, '-vf', 'vidstabtransform=smoothing=30',
-            '-c:v', 'libx264', '-preset', 'slow', '-crf', '18', '-y', stabilized_path
-        ]
-        subprocess.run(stabilize_command_apply, check=True)
-        
-        stabilized_files.append(stabilized_path)
+    manifest = IngestManifest(folder_path)
+    threads = ffmpeg_threads(workers)
 
-    # Step 2: Apply enhanced morph transitions
-    transition_duration = 0.5  # 0.5 seconds before and after
-    enhanced_transition = "xfade=transition=smoothleft:duration=0.5:offset=4.5"  # Smooth morph effect
-
-    for i in range(len(stabilized_files) - 1):
-        input1 = stabilized_files[i]
-        input2 = stabilized_files[i + 1]
-        output_transition = os.path.join(folder_path, f'transition_{i}.mp4')
+    # Step 1: Stabilize the video to keep the character centered
+    stabilize_jobs = [
+        stabilize_job(os.path.join(folder_path, file), os.path.join(folder_path, "stabilized_" + file), preset, threads)
+        for file in files
+    ]
+    stats = run_jobs(stabilize_jobs, manifest, workers, label="Stabilized")
+    stabilized_files = [job.output for job in stabilize_jobs if os.path.exists(job.output)]
 
-        transition_command = [
-            'ffmpeg', '-i', input1, '-i', input2,
-            '-filter_complex', enhanced_transition, '-y', output_transition
+    # Step 2: Apply enhanced morph transitions
+    if transitions:
+        transition_jobs = [
+            transition_job(stabilized_files[i], stabilized_files[i + 1],
+                           os.path.join(folder_path, f'transition_{i}.mp4'), threads)
+            for i in range(len(stabilized_files) - 1)
         ]
-        subprocess.run(transition_command, check=True)
+        run_jobs(transition_jobs, manifest, workers, label="Transitions")
 
     print("Enhanced stabilization and morph transition applied.")
+    return stats
 
 if __name__ == "__main__":
-    convert_and_stabilize_videos(r"C:\Users\amvk2\OneDrive\Documents\Santhu mini project\ISL_VIDEOS")
+    parser = argparse.ArgumentParser(description="Stabilize every MP4 in a folder with ffmpeg vidstab, in parallel. "
+                                                 "Re-running resumes: clips already stabilized from the same content are skipped.")
+    parser.add_argument("folder", help="folder of .mp4 clips (e.g. ISL_VIDEOS)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="ffmpeg jobs at once (default: half the CPUs)")
+    parser.add_argument("--preset", default="slow", help="x264 preset for the stabilized output (default: slow)")
+    parser.add_argument("--no-transitions", dest="transitions", action="store_false",
+                        help="skip the xfade transition clips between consecutive files")
+    args = parser.parse_args()
+    convert_and_stabilize_videos(args.folder, args.workers, args.preset, args.transitions)
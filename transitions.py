@@ -0,0 +1,285 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import cv2
+import numpy as np
+from metrics import span
+from trim import TRIM_IDLE
+from gloss_index import get_gloss_index
+
+# ========== Config ==========
+FLOW_MAX_WIDTH = 320      # optical flow runs on the first pyramid level at or below this width
+MAX_CACHED_FLOWS = 256
+MAX_CACHED_TRANSITIONS = 64
+LIBRARY_FILE = "transitions.npz"
+LIBRARY_VERSION = 2        # bump when stored transitions stop matching what playback uses
+
+FARNEBACK_PARAMS = dict(
+    pyr_scale=0.5,  # Pyramid scale
+    levels=3,       # Number of pyramid levels
+    winsize=15,     # Window size
+    iterations=3,   # Iterations at each pyramid level
+    poly_n=5,       # Size of pixel neighborhood
+    poly_sigma=1.2, # Standard deviation for polynomial expansion
+    flags=0,
+)
+
+
+@lru_cache(maxsize=8)
+def base_grid(h, w):
+    """Identity sampling grid for an h x w frame, built once per resolution."""
+    grid_x = np.tile(np.arange(w, dtype=np.float32), (h, 1))
+    grid_y = np.tile(np.arange(h, dtype=np.float32).reshape(h, 1), (1, w))
+    grid_x.setflags(write=False)
+    grid_y.setflags(write=False)
+    return grid_x, grid_y
+
+
+def match_size(frame1, frame2):
+    """Resize frame2 to frame1's dimensions if they differ."""
+    if frame1.shape != frame2.shape:
+        frame2 = cv2.resize(frame2, (frame1.shape[1], frame1.shape[0]),
+                            interpolation=cv2.INTER_LINEAR)
+    return frame2
+
+
+def compute_flow(frame1, frame2):
+    """Farneback flow from frame1 to frame2, computed on a downscaled pyramid level.
+
+    Both frames are pyrDown'ed until they fit FLOW_MAX_WIDTH, flow is computed
+    there, then upsampled back to full resolution with vectors rescaled.
+    """
+    gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
+    gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
+    h, w = gray1.shape
+    while gray1.shape[1] > FLOW_MAX_WIDTH:
+        gray1 = cv2.pyrDown(gray1)
+        gray2 = cv2.pyrDown(gray2)
+    flow = cv2.calcOpticalFlowFarneback(gray1, gray2, None, **FARNEBACK_PARAMS)
+    if flow.shape[:2] != (h, w):
+        sx = w / flow.shape[1]
+        sy = h / flow.shape[0]
+        flow = cv2.resize(flow, (w, h), interpolation=cv2.INTER_LINEAR)
+        flow[..., 0] *= sx
+        flow[..., 1] *= sy
+    return flow
+
+
+def _blend_batch(a, b, t):
+    """Cross-dissolve stacks a -> b with per-step weights t, in 8.8 fixed point."""
+    wb = np.round(t * 256).astype(np.uint16).reshape(-1, 1, 1, 1)
+    out = a.astype(np.uint16) * (256 - wb)
+    out += b.astype(np.uint16) * wb
+    out += 128
+    out >>= 8
+    return out.astype(np.uint8)
+
+
+def _remap_batch(frame, map_x, map_y):
+    """Warp one frame with a (steps, h, w) stack of maps in a single cv2.remap call."""
+    steps, h, w = map_x.shape
+    warped = cv2.remap(frame, map_x.reshape(steps * h, w), map_y.reshape(steps * h, w),
+                       interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return warped.reshape(steps, h, w, -1)
+
+
+def crossfade(frame1, frame2, steps=10):
+    """Plain alpha blend from frame1 to frame2, all steps in one pass."""
+    frame2 = match_size(frame1, frame2)
+    t = np.arange(steps, dtype=np.float32) / steps
+    return _blend_batch(frame1[None], frame2[None], t)
+
+
+def flow_morph(frame1, frame2, flow, steps=10, bidirectional=False):
+    """Optical-flow morph from frame1 to frame2, returned as a (steps, h, w, 3) array.
+
+    The forward mode warps frame1 along the flow and dissolves into frame2;
+    bidirectional also warps frame2 back towards frame1 before dissolving.
+    """
+    frame2 = match_size(frame1, frame2)
+    h, w = frame1.shape[:2]
+    grid_x, grid_y = base_grid(h, w)
+    t = (np.arange(steps, dtype=np.float32) / steps).reshape(-1, 1, 1)
+    fx = flow[..., 0]
+    fy = flow[..., 1]
+    if bidirectional:
+        warp1 = _remap_batch(frame1, grid_x + t * fx, grid_y + t * fy)
+        warp2 = _remap_batch(frame2, grid_x - (1 - t) * fx, grid_y - (1 - t) * fy)
+    else:
+        warp1 = _remap_batch(frame1, grid_x - t * fx, grid_y - t * fy)
+        warp2 = frame2[None]
+    return _blend_batch(warp1, warp2, t.ravel())
+
+
+def library_key(pair, steps, mode, index):
+    """Archive member name for a precomputed transition between two clips.
+
+    Each clip's mtime and size (from the clip manifest index) are part of the
+    name, so re-recording either clip turns its stored transitions into
+    misses, and so are the format version and whether idle frames are
+    trimmed, which decides the frames the morph starts and ends on. None if a
+    clip is missing.
+    """
+    out_token = index.token(pair[0])
+    in_token = index.token(pair[1])
+    if out_token is None or in_token is None:
+        return None
+    return f"v{LIBRARY_VERSION}|trim{int(TRIM_IDLE)}|{mode}|{steps}|{out_token}|{in_token}"
+
+
+def is_current_key(key, index):
+    """Whether an archive member still matches its clips in the manifest."""
+    parts = key.split("|")
+    if len(parts) < 4:
+        return False
+    mode, steps, out_token, in_token = parts[-4:]
+    pair = (out_token.rsplit("@", 1)[0], in_token.rsplit("@", 1)[0])
+    return key == library_key(pair, steps, mode, index)
+
+
+class TransitionLibrary:
+    """Precomputed transitions written by precompute-transitions.py.
+
+    Members of the .npz archive are decompressed lazily on first lookup.
+    Clip versions come from the manifest of the archive's directory.
+    """
+
+    def __init__(self, path, index=None):
+        self.path = path
+        self.index = index or get_gloss_index(os.path.dirname(path))
+        self._archive = np.load(path)
+        self._keys = set(self._archive.files)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pair, steps, mode, shape):
+        """Return the stored transition for pair, or None if absent, stale or a different size."""
+        key = library_key(pair, steps, mode, self.index)
+        if key not in self._keys:
+            self.misses += 1
+            return None
+        with self._lock:
+            frames = self._archive[key]
+        if frames.shape[1:] != shape:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return frames
+
+
+def open_transition_library(video_dir, index=None):
+    """Open the precomputed transition archive in video_dir, or None if absent."""
+    path = os.path.join(video_dir, LIBRARY_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        return TransitionLibrary(path, index)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable transition library: {e}")
+        return None
+
+
+class TransitionEngine:
+    """Builds word-to-word transitions and memoizes them per (clip_out, clip_in) pair.
+
+    Flow fields and finished transition stacks are kept in small LRU maps, so a
+    phrase that repeats a pair of clips never recomputes optical flow. When a
+    precomputed library is attached it is consulted before any live computation.
+    With a clip manifest (index) attached, memo keys carry each clip's
+    mtime/size token, so a re-recorded clip stops reusing its old morph.
+    """
+
+    def __init__(self, max_flows=MAX_CACHED_FLOWS, max_transitions=MAX_CACHED_TRANSITIONS,
+                 library=None, index=None):
+        self.library = library
+        self.index = index
+        self.max_flows = max_flows
+        self.max_transitions = max_transitions
+        self._flows = OrderedDict()
+        self._transitions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, table, key):
+        with self._lock:
+            value = table.get(key)
+            if value is not None:
+                table.move_to_end(key)
+            return value
+
+    def _store(self, table, key, value, limit):
+        with self._lock:
+            table[key] = value
+            table.move_to_end(key)
+            while len(table) > limit:
+                table.popitem(last=False)
+
+    def _versioned(self, pair):
+        """pair plus the manifest token of each clip, the identity memo entries are kept under."""
+        if self.index is None:
+            return pair
+        return pair, tuple(self.index.token(clip) for clip in pair)
+
+    def flow(self, frame1, frame2, pair=None):
+        """Flow from frame1 to frame2, cached under pair when one is given."""
+        frame2 = match_size(frame1, frame2)
+        key = None if pair is None else (self._versioned(pair), frame1.shape)
+        if key is not None:
+            flow = self._lookup(self._flows, key)
+            if flow is not None:
+                return flow
+        flow = compute_flow(frame1, frame2)
+        if key is not None:
+            self._store(self._flows, key, flow, self.max_flows)
+        return flow
+
+    @span("transition")
+    def transition(self, frame1, frame2, pair=None, steps=10, mode="forward"):
+        """Transition frames from frame1 to frame2.
+
+        mode is "forward" or "bidirectional" for optical-flow morphing, or
+        "crossfade" for a plain blend. pair identifies the two clips (e.g. their
+        paths); without it nothing is cached.
+        """
+        if frame1 is None or frame2 is None:
+            return []
+        key = None if pair is None else (self._versioned(pair), frame1.shape, steps, mode)
+        if key is not None:
+            frames = self._lookup(self._transitions, key)
+            if frames is not None:
+                self.hits += 1
+                return frames
+            self.misses += 1
+            if self.library is not None:
+                frames = self.library.get(pair, steps, mode, frame1.shape)
+                if frames is not None:
+                    frames.setflags(write=False)
+                    self._store(self._transitions, key, frames, self.max_transitions)
+                    return frames
+
+        if mode == "crossfade":
+            frames = crossfade(frame1, frame2, steps)
+        else:
+            flow = self.flow(frame1, frame2, pair)
+            frames = flow_morph(frame1, frame2, flow, steps,
+                                bidirectional=(mode == "bidirectional"))
+        frames.setflags(write=False)
+        if key is not None:
+            self._store(self._transitions, key, frames, self.max_transitions)
+        return frames
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_transition_engine():
+    """Return the shared engine for this process, creating it on first use."""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = TransitionEngine()
+        return _default_engine
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import atexit
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from metrics import span
+
+# ========== Config ==========
+MEMORY_DB = os.environ.get("ISL_TRANSLATION_DB", "translation_memory.db")
+MAX_ENTRIES = int(os.environ.get("ISL_TRANSLATION_MEMORY_SIZE", "50000"))
+FLUSH_SECONDS = float(os.environ.get("ISL_TRANSLATION_FLUSH_SECONDS", "30"))  # how often hit recency is saved
+
+
+def normalize_text(text):
+    """Fold text for lookups: NFKC, casefold, punctuation dropped, whitespace collapsed.
+
+    Format characters (zero-width joiners used inconsistently in Indic
+    scripts, bidi marks in Urdu) are removed so they never split a match.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    folded = []
+    for c in text:
+        category = unicodedata.category(c)
+        if category == "Cf":
+            continue
+        folded.append(" " if category.startswith("P") else c)
+    return " ".join("".join(folded).split())
+
+
+def source_language(lang_code):
+    """Translation source language for a speech language code ('hi-IN' -> 'hi')."""
+    return lang_code.split("-")[0].lower()
+
+
+# ========== Translation Memory ==========
+class TranslationMemory:
+    """Persistent translation cache keyed by normalized source text and language.
+
+    All entries are loaded into an in-memory LRU at startup, so lookups never
+    touch the database. New translations are written through to SQLite, and
+    the least recently used rows are deleted once max_entries is exceeded.
+    Recency of hits is saved by a background thread every flush_seconds and
+    by close(), so a read-mostly memory keeps its LRU order across restarts.
+    """
+
+    def __init__(self, db_path=MEMORY_DB, max_entries=MAX_ENTRIES, flush_seconds=FLUSH_SECONDS):
+        self.max_entries = max_entries
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._touched = set()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute('''CREATE TABLE IF NOT EXISTS memory (
+                                source TEXT NOT NULL,
+                                lang TEXT NOT NULL,
+                                target TEXT NOT NULL,
+                                last_used REAL NOT NULL,
+                                PRIMARY KEY (source, lang))''')
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT source, lang, target FROM memory ORDER BY last_used DESC LIMIT ?",
+            (max_entries,)).fetchall()
+        for source, lang, target in reversed(rows):
+            self._entries[(source, lang)] = target
+        self._closed = threading.Event()
+        if flush_seconds:
+            threading.Thread(target=self._flush_periodically, name="isl-memory-flush", daemon=True).start()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text, lang):
+        key = (normalize_text(text), lang)
+        with self._lock:
+            target = self._entries.get(key)
+            if target is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._touched.add(key)
+            self.hits += 1
+            return target
+
+    def put_many(self, items, lang):
+        """Store (source_text, translation) pairs for one language."""
+        now = time.time()
+        with self._lock:
+            rows = []
+            for text, target in items:
+                key = (normalize_text(text), lang)
+                self._entries[key] = target
+                self._entries.move_to_end(key)
+                self._touched.discard(key)
+                rows.append((key[0], lang, target, now))
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            # Persist recency of hits along with the new rows, in one transaction
+            touched = self._take_touched(now)
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO memory (source, lang, target, last_used) VALUES (?, ?, ?, ?)", rows)
+                self._conn.executemany("UPDATE memory SET last_used = ? WHERE source = ? AND lang = ?", touched)
+                self._conn.executemany("DELETE FROM memory WHERE source = ? AND lang = ?", evicted)
+
+    def put(self, text, lang, target):
+        self.put_many([(text, target)], lang)
+
+    def _take_touched(self, now):
+        touched = [(now, s, l) for s, l in self._touched]
+        self._touched.clear()
+        return touched
+
+    def flush(self):
+        """Save the recency of entries hit since the last write."""
+        with self._lock:
+            touched = self._take_touched(time.time())
+            if touched:
+                with self._conn:
+                    self._conn.executemany("UPDATE memory SET last_used = ? WHERE source = ? AND lang = ?", touched)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                # Recency is only an eviction hint; never let it take the thread down
+                print(f"Translation memory flush failed: {e}")
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+
+
+# ========== Translation Service ==========
+class TranslationService:
+    """Translates to English through the memory, batching network calls for misses."""
+
+    def __init__(self, memory=None):
+        self.memory = memory if memory is not None else TranslationMemory()
+        self._translator = None
+        self._translator_lock = threading.Lock()
+
+    def _client(self):
+        with self._translator_lock:
+            if self._translator is None:
+                from googletrans import Translator
+                self._translator = Translator()
+            return self._translator
+
+    def translate_many(self, texts, lang, dest="en"):
+        """Translate many phrases, sending only the unseen ones in a single request."""
+        results = [self.memory.get(t, lang) for t in texts]
+        missing = list(OrderedDict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        if missing:
+            with span("translate_api"):
+                translated = self._client().translate(missing, src=lang, dest=dest)
+            fresh = {src: t.text for src, t in zip(missing, translated)}
+            self.memory.put_many(fresh.items(), lang)
+            results = [r if r is not None else fresh[t] for t, r in zip(texts, results)]
+        return results
+
+    def translate(self, text, lang, dest="en"):
+        return self.translate_many([text], lang, dest)[0]
+
+
+@span("translate")
+def translate_utterance(text, lang_code, dictionary=None):
+    """Turn a recognized utterance into upper-case English for signing.
+
+    Phrases found in the dictionary map straight to their gloss; only the
+    stretches between them are machine translated, together in one batch.
+    Returns (english_text, fully_from_dictionary).
+    """
+    segments = dictionary.segment(text) if dictionary is not None else []
+    if all(gloss is None for _, gloss in segments):
+        # Nothing known: translate the utterance as spoken, punctuation and all
+        segments = [(text, None)]
+    pending = [piece for piece, gloss in segments if gloss is None]
+    lang = source_language(lang_code)
+    if pending and lang != "en":
+        pending = get_translation_service().translate_many(pending, lang)
+    translated = iter(pending)
+    parts = [gloss if gloss is not None else next(translated) for _, gloss in segments]
+    return " ".join(parts).upper().strip(), not pending
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_translation_service():
+    """Return the process-wide translation service, loading the memory on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TranslationService()
+            atexit.register(_service.memory.close)
+        return _service
+
+
+if __name__ == "__main__":
+    # Pre-warm the memory: python translation.py hi phrases.txt
+    if len(sys.argv) != 3:
+        print("Usage: python translation.py <source-lang> <phrases-file>")
+        sys.exit(1)
+    with open(sys.argv[2], encoding="utf-8") as f:
+        phrases = [line.strip() for line in f if line.strip()]
+    service = get_translation_service()
+    for phrase, english in zip(phrases, service.translate_many(phrases, sys.argv[1])):
+        print(f"{phrase} -> {english}")
+    print(f"Translation memory holds {len(service.memory)} entries")
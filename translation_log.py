@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+
+# ========== Config ==========
+LOG_DB = os.environ.get("ISL_LOG_DB", "translation_log.db")
+BATCH_ROWS = int(os.environ.get("ISL_LOG_BATCH_ROWS", "50"))          # commit after this many rows...
+BATCH_MS = float(os.environ.get("ISL_LOG_BATCH_MS", "250"))           # ...or once the oldest row waited this long
+QUEUE_SIZE = 10000
+
+# Columns added to the original logs table; old rows keep NULLs
+EXTRA_COLUMNS = {
+    "app": "TEXT",
+    "language": "TEXT",
+    "source_text": "TEXT",
+    "clips": "TEXT",       # JSON list of clip names, or words that were spelled out
+    "latency": "TEXT",     # JSON object of stage -> milliseconds
+}
+
+_STOP = object()
+
+
+def init_db(conn):
+    """Create or upgrade the logs table and switch the database to WAL."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute('''CREATE TABLE IF NOT EXISTS logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    recognized_text TEXT)''')
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    for name, kind in EXTRA_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE logs ADD COLUMN {name} {kind}")
+    conn.commit()
+
+
+class TranslationLogWriter:
+    """Queues log rows and writes them from one background thread.
+
+    log() only puts a tuple on an in-memory queue, so the request path never
+    waits on SQLite. The writer thread owns the only connection and commits
+    rows in groups of up to BATCH_ROWS, or after BATCH_MS, whichever comes
+    first. If the queue is full the row is dropped and counted rather than
+    blocking the caller.
+    """
+
+    def __init__(self, db_path=LOG_DB, batch_rows=BATCH_ROWS, batch_ms=BATCH_MS):
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_ms / 1000.0
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="isl-log-writer", daemon=True)
+        self._thread.start()
+
+    def log(self, text, app=None, language=None, source_text=None, clips=None, latency=None):
+        """Record one recognized or typed sentence."""
+        row = (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            text,
+            app,
+            language,
+            source_text,
+            json.dumps([os.path.basename(c) for c in clips]) if clips is not None else None,
+            json.dumps({k: round(v, 1) for k, v in latency.items()}) if latency else None,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything logged so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_db(conn)
+        except sqlite3.Error as e:
+            self.error = e
+            return
+        try:
+            while True:
+                item = self._queue.get()
+                batch, waiters, stop = [], [], False
+                deadline = time.monotonic() + self.batch_seconds
+                while True:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stop or waiters or len(batch) >= self.batch_rows:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO logs (timestamp, recognized_text, app, language, source_text, clips, latency) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            # Logging must never take the app down; keep the last error for diagnostics
+            self.error = e
+            self.dropped += len(batch)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_translation_log():
+    """Return the process-wide log writer, starting its thread on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TranslationLogWriter()
+            atexit.register(_writer.close)
+        return _writer
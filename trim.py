@@ -0,0 +1,68 @@
+import os
+import numpy as np
+
+# ========== Config ==========
+TRIM_IDLE = os.environ.get("ISL_TRIM_IDLE", "1") != "0"
+ENERGY_WIDTH = 64        # frames are subsampled to about this width before differencing
+TRIM_RATIO = 0.15        # moving = above this fraction of the way from idle to busy energy
+MIN_MOTION = 0.05        # grey levels between idle and busy below which a clip is left whole
+MIN_RUN = 3              # consecutive moving frames needed, so single codec glitches don't count
+PAD_FRAMES = 2           # still frames kept on each side of the active segment
+MIN_ACTIVE_FRAMES = 5
+
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def motion_energy(frames, width=ENERGY_WIDTH):
+    """Mean absolute grey-level change between consecutive frames, shape (len(frames) - 1,).
+
+    Frames are subsampled by striding (no resize), stacked, converted to
+    grey with one matrix product and differenced along time in one pass.
+    """
+    if len(frames) < 2:
+        return np.zeros(0, dtype=np.float32)
+    step = max(1, frames[0].shape[1] // width)
+    small = np.stack([f[::step, ::step] for f in frames]).astype(np.float32)
+    gray = small @ GRAY_WEIGHTS
+    return np.abs(np.diff(gray, axis=0)).mean(axis=(1, 2))
+
+
+def active_segment(energy):
+    """(start, end) frame range that contains the signing, from motion_energy output.
+
+    Idle and busy levels are the 10th and 90th percentiles of the clip's own
+    energy, so lighting and sensor noise set their own threshold; activity
+    starts and ends with the first and last run of MIN_RUN moving frames.
+    Clips without a clear idle/busy contrast (busy less than twice idle), or
+    whose active part would be shorter than MIN_ACTIVE_FRAMES, are returned
+    whole.
+    """
+    count = len(energy) + 1
+    if count < max(MIN_ACTIVE_FRAMES, MIN_RUN + 1):
+        return 0, count
+    idle, busy = np.percentile(energy, [10, 90])
+    if busy - idle < max(MIN_MOTION, idle):
+        return 0, count
+    moving = energy > idle + TRIM_RATIO * (busy - idle)
+    runs = np.flatnonzero(np.convolve(moving, np.ones(MIN_RUN, dtype=int), mode="valid") == MIN_RUN)
+    if len(runs) == 0:
+        return 0, count
+    # energy[i] is the change from frame i to i + 1
+    start = max(0, int(runs[0]) - PAD_FRAMES)
+    end = min(count, int(runs[-1]) + MIN_RUN + 1 + PAD_FRAMES)
+    if end - start < MIN_ACTIVE_FRAMES:
+        return 0, count
+    return start, end
+
+
+def find_trim(frames):
+    """(start, end) of the active segment of a clip's frames."""
+    return active_segment(motion_energy(frames))
+
+
+def active_frames(frames):
+    """frames without idle lead-in and lead-out (unchanged when ISL_TRIM_IDLE=0)."""
+    if not TRIM_IDLE:
+        return frames
+    start, end = find_trim(frames)
+    return frames[start:end]
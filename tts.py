@@ -0,0 +1,256 @@
+import io
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+from metrics import span
+from gloss_index import get_gloss_index
+
+# ========== Config ==========
+DEFAULT_ENGINE = os.environ.get("ISL_TTS_ENGINE")     # None picks the first local engine available
+DEFAULT_VOICE = os.environ.get("ISL_TTS_VOICE")
+CACHE_DIR = os.environ.get("ISL_TTS_CACHE_DIR", ".tts_cache")
+CACHE_VERSION = 1
+EXTENSIONS = {"audio/wav": ".wav", "audio/mp3": ".mp3"}
+
+
+def label_text(label):
+    """Words spoken for a clip label (file name without extension)."""
+    return label.replace("_", " ")
+
+
+# ========== Engines ==========
+class TTSEngine(ABC):
+    """Interface every text-to-speech engine implements.
+
+    synthesize() returns the complete audio for text as bytes in self.mime.
+    voice selects an engine-specific voice (None for default_voice).
+    """
+
+    name = "base"
+    mime = "audio/wav"
+    default_voice = None
+
+    @abstractmethod
+    def synthesize(self, text, voice=None):
+        """Complete audio for text as bytes in self.mime."""
+
+
+class EspeakEngine(TTSEngine):
+    """eSpeak NG command line synthesizer; offline, ships with most Linux distributions."""
+
+    name = "espeak"
+    default_voice = "en"
+
+    def __init__(self):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.binary is None:
+            raise RuntimeError("espeak-ng is not installed")
+
+    def synthesize(self, text, voice=None):
+        result = subprocess.run([self.binary, "--stdout", "-v", voice or self.default_voice, text],
+                                capture_output=True, check=True)
+        return result.stdout
+
+
+class Pyttsx3Engine(TTSEngine):
+    """pyttsx3 over the platform voices (SAPI5, NSSpeechSynthesizer, eSpeak); offline."""
+
+    name = "pyttsx3"
+
+    def __init__(self):
+        import pyttsx3
+        self._engine = pyttsx3.init()
+        # The driver keeps the last voice set, so the default is resolved once and set explicitly
+        self.default_voice = self._engine.getProperty("voice")
+        # The driver is not thread-safe and runAndWait() is not re-entrant
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, voice=None):
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                self._engine.setProperty("voice", voice or self.default_voice)
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS via gTTS (needs network); voice is the language code."""
+
+    name = "gtts"
+    mime = "audio/mp3"
+    default_voice = "en"
+
+    def __init__(self):
+        from gtts import gTTS
+        self._gtts = gTTS
+
+    def synthesize(self, text, voice=None):
+        buffer = io.BytesIO()
+        self._gtts(text=text, lang=voice or self.default_voice).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+ENGINES = {"espeak": EspeakEngine, "pyttsx3": Pyttsx3Engine, "gtts": GTTSEngine}
+
+
+def register_engine(name, factory):
+    """Make another TTS engine selectable by name (factory() -> TTSEngine)."""
+    ENGINES[name] = factory
+
+
+def available_engines():
+    """Engine names usable in this environment, local engines first."""
+    names = []
+    if shutil.which("espeak-ng") or shutil.which("espeak"):
+        names.append("espeak")
+    try:
+        import pyttsx3  # noqa: F401
+        names.append("pyttsx3")
+    except ImportError:
+        pass
+    try:
+        import gtts  # noqa: F401
+        names.append("gtts")
+    except ImportError:
+        pass
+    return names + [n for n in ENGINES if n not in ("espeak", "pyttsx3", "gtts")]
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_tts_engine(name=None):
+    """Return the shared engine called name (default: ISL_TTS_ENGINE, else the first available)."""
+    if name is None:
+        name = DEFAULT_ENGINE
+    if name is None:
+        available = available_engines()
+        if not available:
+            raise RuntimeError("No text-to-speech engine available; install espeak-ng, pyttsx3 or gTTS")
+        name = available[0]
+    with _instances_lock:
+        engine = _instances.get(name)
+        if engine is None:
+            if name not in ENGINES:
+                raise ValueError(f"Unknown TTS engine '{name}' (available: {', '.join(ENGINES)})")
+            engine = _instances[name] = ENGINES[name]()
+        return engine
+
+
+# ========== Audio Cache ==========
+def audio_key(text, engine_name, voice):
+    """Content address for spoken text: the text itself, the engine and the voice."""
+    payload = json.dumps([CACHE_VERSION, engine_name, voice, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Synthesized speech on disk under cache_dir/<2-char prefix>/<key><ext>.
+
+    Entries are immutable (the key covers everything that shapes the audio)
+    and written atomically, so concurrent sessions can share the directory.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key, mime):
+        return os.path.join(self.cache_dir, key[:2], key + EXTENSIONS[mime])
+
+    def get(self, key, mime):
+        try:
+            with open(self._path(key, mime), "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, mime, data):
+        path = self._path(key, mime)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def __contains__(self, item):
+        key, mime = item
+        return os.path.exists(self._path(key, mime))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache()
+        return _cache
+
+
+@span("tts")
+def synthesize(text, engine=None, voice=None):
+    """Speech for text as (data, mime), generated once per text/engine/voice and then read from disk."""
+    engine = get_tts_engine(engine)
+    voice = voice or DEFAULT_VOICE or engine.default_voice
+    key = audio_key(text, engine.name, voice)
+    cache = get_audio_cache()
+    data = cache.get(key, engine.mime)
+    if data is None:
+        data = engine.synthesize(text, voice)
+        cache.put(key, engine.mime, data)
+    return data, engine.mime
+
+
+def pregenerate(labels, engine=None, voice=None):
+    """Synthesize every label that is not cached yet; returns (generated, already_cached, failed)."""
+    engine = get_tts_engine(engine)
+    voice = voice or DEFAULT_VOICE or engine.default_voice
+    cache = get_audio_cache()
+    generated = cached = failed = 0
+    for i, label in enumerate(labels, 1):
+        text = label_text(label)
+        if (audio_key(text, engine.name, voice), engine.mime) in cache:
+            cached += 1
+            continue
+        try:
+            synthesize(text, engine.name, voice)
+            generated += 1
+            print(f"[{i}/{len(labels)}] {text}")
+        except Exception as e:
+            failed += 1
+            print(f"[{i}/{len(labels)}] {text}: FAILED ({e})", file=sys.stderr)
+    return generated, cached, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate speech for every clip label so playback works offline.")
+    parser.add_argument("video_dir", nargs="?", default="ISL_VIDEOS")
+    parser.add_argument("--engine", choices=list(ENGINES), default=None, help="default: first available local engine")
+    parser.add_argument("--voice", default=None, help="engine-specific voice (espeak/gtts: language code)")
+    args = parser.parse_args()
+
+    labels = get_gloss_index(args.video_dir).labels()
+    engine = get_tts_engine(args.engine)
+    generated, cached, failed = pregenerate(labels, engine.name, args.voice)
+    print(f"{engine.name}: generated {generated}, already cached {cached}, failed {failed} of {len(labels)} labels")